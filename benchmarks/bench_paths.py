@@ -0,0 +1,70 @@
+# benchmarks/bench_paths.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Pfadstring-Erzeugung der Canvas-Apps.
+Vergleicht die bisherige Schleife (ein f-String pro Punkt) mit ec_geometry.encode_path
+für 1, 7, 30 und 365 Tage in Viertelstunden-Auflösung.
+
+Aufruf:
+    python benchmarks/bench_paths.py [--repeat 5] [--precision 1]
+"""
+from __future__ import annotations
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ec_geometry import encode_path  # noqa: E402
+
+POINTS_PER_DAY = 96  # 15-min-Raster
+DAYS = [1, 7, 30, 365]
+CANVAS_WIDTH = 1200
+CANVAS_HEIGHT = 600
+
+
+def _loop_polygon(xu, yu, xl, yl) -> str:
+    # Referenz: bisherige Implementierung aus _build_normalized_path
+    parts = [f"M {xu[0]:.1f} {yu[0]:.1f}"]
+    for i in range(1, len(xu)):
+        parts.append(f"L {xu[i]:.1f} {yu[i]:.1f}")
+    for i in range(len(xl)):
+        parts.append(f"L {xl[i]:.1f} {yl[i]:.1f}")
+    parts.append("Z")
+    return " ".join(parts)
+
+
+def _inputs(days: int, seed: int = 0):
+    n = days * POINTS_PER_DAY
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, CANVAS_WIDTH, n)
+    top = rng.random(n) * CANVAS_HEIGHT
+    bottom = top * rng.random(n)
+    return x, top, x[::-1], bottom[::-1]
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--precision", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    print(f"{'Tage':>5} {'Punkte':>8} {'Schleife [ms]':>14} {'encode_path [ms]':>17} {'Faktor':>7}")
+    for days in DAYS:
+        xu, yu, xl, yl = _inputs(days)
+        if args.precision == 1:
+            assert _loop_polygon(xu, yu, xl, yl) == encode_path(
+                np.concatenate([xu, xl]), np.concatenate([yu, yl]), precision=1, close=True)
+        t_loop = min(timeit.repeat(lambda: _loop_polygon(xu, yu, xl, yl), number=1, repeat=args.repeat))
+        t_vec = min(timeit.repeat(
+            lambda: encode_path(np.concatenate([xu, xl]), np.concatenate([yu, yl]),
+                                precision=args.precision, close=True),
+            number=1, repeat=args.repeat))
+        print(f"{days:>5} {2 * len(xu):>8} {t_loop * 1e3:>14.2f} {t_vec * 1e3:>17.2f} {t_loop / t_vec:>6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
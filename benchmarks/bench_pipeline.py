@@ -0,0 +1,168 @@
+# benchmarks/bench_pipeline.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark: komplette Pipeline mit synthetischen public_power-Antworten (ohne Netz).
+Stufen je Größe (1d, 1w, 1m, 1y, 10y in 15-min-Auflösung):
+    make_dataframe -> transform_df -> /power-JSON -> resample -> Flächen (Layer)
+    -> Fabric-Pfade -> SVG (aus Fabric-JSON) / SVG (direkt aus der Szene)
+Gemessen: beste Laufzeit aus --repeat Läufen und Spitzen-Speicher (tracemalloc) je Stufe.
+Ergebnis als JSON (inkl. Commit + Versionen), Vergleich zweier Läufe per --compare.
+
+Aufruf:
+    python benchmarks/bench_pipeline.py [--sizes 1d,1w,1m,1y,10y] [--repeat 3] [--out bench.json]
+    python benchmarks/bench_pipeline.py --compare alt.json --out neu.json
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import ec_fetch  # noqa: E402,F401  (Submodul-Pfad für app.*)
+from app.parser import make_dataframe  # noqa: E402
+from ec_scene import (  # noqa: E402
+    DEFAULT_GEOMETRY, DEFAULT_ORDER, build_scene, compute_scale, fabric_json_to_svg, iter_scene_svg,
+    layers_to_fabric, scene_to_fabric, area_layers,
+)
+from ec_server import _power_payload  # noqa: E402
+from ec_synthetic import public_power_payload  # noqa: E402
+from ec_transform import choose_resample_rule, resample_mean, transform_df  # noqa: E402
+
+# Größen der Benchmark-Szenarien (Name -> Tage)
+SIZES = {"1d": 1, "1w": 7, "1m": 30, "1y": 365, "10y": 3650}
+
+# Große Szenarien nur einmal laufen lassen (10 Jahre make_dataframe dauert Sekunden)
+SINGLE_RUN_POINTS = 100_000
+
+
+def payload_for(size: str, end: dt.date = dt.date(2025, 1, 1), seed: int = 0) -> dict:
+    """Szenario aus SIZES, endend bei `end` (exklusiv)."""
+    return public_power_payload(end - dt.timedelta(days=SIZES[size]), end, seed=seed)
+
+
+def _measure(fn, repeat: int) -> tuple[float, int, object]:
+    """(beste Laufzeit s, Spitzen-Speicher Bytes, Ergebnis). Speicher in einem eigenen Lauf,
+    damit tracemalloc die Zeitmessung nicht verfälscht."""
+    best = float("inf")
+    result = None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def run_size(size: str, repeat: int) -> dict:
+    days = SIZES[size]
+    payload = payload_for(size)
+    points = len(payload["unix_seconds"])
+    rep = 1 if points > SINGLE_RUN_POINTS else repeat
+    stages: dict[str, dict] = {}
+
+    def stage(name, fn):
+        t, peak, out = _measure(fn, rep)
+        stages[name] = {"seconds": round(t, 6), "peak_bytes": int(peak)}
+        return out
+
+    end = dt.date(2025, 1, 1)
+    start = end - dt.timedelta(days=days)
+    df_raw = stage("make_dataframe", lambda: make_dataframe(payload))
+    _, dfc, dfb, dfa = stage("transform_df", lambda: transform_df(df_raw))
+    stage("power_json", lambda: json.dumps(_power_payload(start, end, dfc, dfb, dfa)))
+
+    rule = choose_resample_rule(pd.Timedelta(days=days), DEFAULT_GEOMETRY.plot_width)
+    dfc_r, dfa_r = stage("resample", lambda: (resample_mean(dfc, rule), resample_mean(dfa, rule)))
+    order = [s for s in DEFAULT_ORDER if s in dfc_r.columns]
+    _, y_scale = compute_scale(dfc_r, order, dfa_r, True)
+    layers = stage("area_layers", lambda: area_layers(dfc_r, order, y_scale))
+    stage("fabric_paths", lambda: layers_to_fabric(layers))
+
+    scene = build_scene(dfc_r, dfa_r, show_axes=True)
+    fabric = scene_to_fabric(scene)
+    svg = stage("fabric_json_to_svg", lambda: fabric_json_to_svg(fabric, DEFAULT_GEOMETRY.width, DEFAULT_GEOMETRY.height))
+    stage("scene_svg", lambda: "".join(iter_scene_svg(scene)))
+
+    return {
+        "days": days,
+        "points": points,
+        "resample_rule": rule,
+        "canvas_points": len(dfc_r),
+        "svg_bytes": len(svg.encode("utf-8")),
+        "stages": stages,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _print_table(results: dict, baseline: dict | None = None) -> None:
+    head = f"{'Größe':>5} {'Stufe':<20} {'Zeit [ms]':>10} {'Peak [MiB]':>11}"
+    print(head + (f" {'vs. Basis':>10}" if baseline else ""))
+    for size, res in results.items():
+        for name, st in res["stages"].items():
+            line = f"{size:>5} {name:<20} {st['seconds'] * 1e3:>10.2f} {st['peak_bytes'] / 2**20:>11.2f}"
+            if baseline:
+                old = baseline.get(size, {}).get("stages", {}).get(name)
+                line += f" {st['seconds'] / old['seconds']:>9.2f}x" if old and old["seconds"] else f" {'–':>10}"
+            print(line)
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", default=",".join(SIZES), help="Kommagetrennt aus " + ", ".join(SIZES))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", type=Path, default=Path("bench_pipeline.json"))
+    ap.add_argument("--compare", type=Path, default=None, help="früheres Ergebnis-JSON zum Vergleich")
+    args = ap.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        ap.error(f"Unbekannte Größe(n): {', '.join(unknown)}")
+
+    results = {}
+    for size in sizes:
+        results[size] = run_size(size, args.repeat)
+        print(f"{size}: {results[size]['points']} Punkte fertig", file=sys.stderr)
+
+    baseline = json.loads(args.compare.read_text("utf-8"))["results"] if args.compare else None
+    _print_table(results, baseline)
+
+    doc = {
+        "benchmark": "pipeline",
+        "created": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "versions": {"pandas": pd.__version__, "numpy": np.__version__},
+        "repeat": args.repeat,
+        "results": results,
+    }
+    args.out.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"Ergebnis: {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
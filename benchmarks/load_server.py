@@ -0,0 +1,258 @@
+# benchmarks/load_server.py
+# -*- coding: utf-8 -*-
+"""
+Lasttest: ec_server gegen den lokalen Stub-Upstream (ec_stub.py), ohne Netz.
+- Startet Stub und Server (uvicorn, 1 Worker) als eigene Prozesse
+- Anfrage-Mix: überwiegend "letzte volle Woche", einige zufällige Wochen, lange Zeiträume, ungültige
+- Geschlossene Schleife: --concurrency Clients, je Anfrage sofort die nächste, für --duration Sekunden
+- Bericht: Durchsatz, p50/p95/p99 (gesamt und je Anfrageart), Statuscodes, RSS des Servers über die Zeit
+- Varianten nacheinander vergleichen: sync (/power, ohne Cache), cached (/power, EC_POWER_CACHE=1),
+  svg (/power.svg, Bild-Cache); jede Variante startet kalt mit eigenem, leerem EC_PIPELINE_DIR
+
+Aufruf:
+    python benchmarks/load_server.py --variants sync,cached --concurrency 8 --duration 20
+    python benchmarks/load_server.py --variants cached --latency-ms 300 --out load.json
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Variante -> (Pfad, zusätzliche Umgebung des Servers)
+VARIANTS = {
+    "sync": ("/power", {"EC_POWER_CACHE": "0"}),
+    "cached": ("/power", {"EC_POWER_CACHE": "1"}),
+    "svg": ("/power.svg", {}),
+}
+# Anfrageart -> Gewicht
+MIX = {"last_week": 0.70, "random_week": 0.15, "long": 0.07, "invalid": 0.08}
+MEM_SAMPLE_S = 0.5
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Prozess beendet (Code {proc.returncode}): {' '.join(proc.args)}")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nicht erreichbar: {url}")
+
+
+def _rss_bytes(pid: int) -> int | None:
+    """Resident Set Size aus /proc (Linux); sonst None."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def make_query(kind: str, rng: random.Random, today: dt.date) -> dict:
+    """Query-Parameter für eine Anfrageart (ohne Parameter = letzte volle Woche)."""
+    if kind == "last_week":
+        return {}
+    if kind == "random_week":
+        s = today - dt.timedelta(days=rng.randint(14, 3 * 365))
+        return {"start": s.isoformat(), "end": (s + dt.timedelta(days=7)).isoformat()}
+    if kind == "long":
+        days = rng.choice([90, 180, 365])
+        e = today - dt.timedelta(days=rng.randint(7, 365))
+        return {"start": (e - dt.timedelta(days=days)).isoformat(), "end": e.isoformat()}
+    # invalid: Ende vor Start oder kein Datum
+    s = today - dt.timedelta(days=30)
+    return rng.choice([
+        {"start": s.isoformat(), "end": (s - dt.timedelta(days=3)).isoformat()},
+        {"start": "gestern", "end": s.isoformat()},
+    ])
+
+
+def _client(base: str, path: str, stop_at: float, seed: int, out: list, lock: threading.Lock) -> None:
+    rng = random.Random(seed)
+    kinds, weights = list(MIX), list(MIX.values())
+    today = dt.date.today()
+    local = []
+    with requests.Session() as session:
+        while time.perf_counter() < stop_at:
+            kind = rng.choices(kinds, weights)[0]
+            t0 = time.perf_counter()
+            try:
+                r = session.get(base + path, params=make_query(kind, rng, today), timeout=120)
+                status, size = r.status_code, len(r.content)
+            except requests.RequestException:
+                status, size = -1, 0
+            local.append((t0, time.perf_counter() - t0, status, kind, size))
+    with lock:
+        out.extend(local)
+
+
+def _percentiles(lat: np.ndarray) -> dict:
+    if not len(lat):
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99]) * 1e3
+    return {"n": int(len(lat)), "p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2),
+            "max_ms": round(float(lat.max()) * 1e3, 2)}
+
+
+def run_variant(name: str, *, concurrency: int, duration: float, warmup: float, stub_args: list[str],
+                seed: int) -> dict:
+    path, extra_env = VARIANTS[name]
+    stub_port, srv_port = _free_port(), _free_port()
+    # eigener Platten-Cache je Lauf: kein warmer Start aus früheren Läufen oder anderen Varianten
+    pipeline_dir = tempfile.mkdtemp(prefix=f"ec_pipeline_{name}_")
+    env = dict(os.environ, PYTHONPATH=str(ROOT), **extra_env,
+               ENERGY_CHARTS_BASE_URL=f"http://127.0.0.1:{stub_port}", ENERGY_CHARTS_MODE="off",
+               EC_PIPELINE_DIR=pipeline_dir)
+    stub = subprocess.Popen([sys.executable, str(ROOT / "ec_stub.py"), "--port", str(stub_port), *stub_args],
+                            cwd=ROOT, env=env, stderr=subprocess.DEVNULL)
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "ec_server:app", "--port", str(srv_port),
+                               "--log-level", "warning", "--no-access-log"],
+                              cwd=ROOT, env=env, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{srv_port}"
+    try:
+        _wait_ready(f"http://127.0.0.1:{stub_port}/__stats", stub)
+        _wait_ready(base + "/health", server)
+
+        # Speicher im Hintergrund abtasten
+        mem: list[tuple[float, int]] = []
+        stop = threading.Event()
+        t_begin = time.perf_counter()
+
+        def _sample():
+            while not stop.is_set():
+                rss = _rss_bytes(server.pid)
+                if rss is not None:
+                    mem.append((round(time.perf_counter() - t_begin, 2), rss))
+                stop.wait(MEM_SAMPLE_S)
+
+        sampler = threading.Thread(target=_sample, daemon=True)
+        sampler.start()
+
+        samples: list[tuple] = []
+        lock = threading.Lock()
+        measure_from = t_begin + warmup
+        stop_at = measure_from + duration
+        clients = [threading.Thread(target=_client, args=(base, path, stop_at, seed + i, samples, lock))
+                   for i in range(concurrency)]
+        for c in clients:
+            c.start()
+        for c in clients:
+            c.join()
+        stop.set()
+        sampler.join()
+        upstream = requests.get(f"http://127.0.0.1:{stub_port}/__stats", timeout=5).json()
+    finally:
+        for p in (server, stub):
+            p.terminate()
+            p.wait(timeout=10)
+        shutil.rmtree(pipeline_dir, ignore_errors=True)
+
+    measured = [s for s in samples if s[0] >= measure_from]
+    lat = np.array([s[1] for s in measured])
+    ok = [s for s in measured if 200 <= s[2] < 400 or (s[3] == "invalid" and s[2] == 400)]
+    by_kind = {k: _percentiles(np.array([s[1] for s in measured if s[3] == k])) for k in MIX}
+    statuses: dict[str, int] = {}
+    for s in measured:
+        statuses[str(s[2])] = statuses.get(str(s[2]), 0) + 1
+    rss = [b for _, b in mem]
+    return {
+        "path": path,
+        "env": extra_env,
+        "requests": len(measured),
+        "expected_responses": len(ok),
+        "throughput_rps": round(len(measured) / duration, 2),
+        "latency": _percentiles(lat),
+        "by_kind": by_kind,
+        "status": statuses,
+        "bytes_out": int(sum(s[4] for s in measured)),
+        "upstream": upstream,
+        "rss_mib": {
+            "start": round(rss[0] / 2**20, 1) if rss else None,
+            "peak": round(max(rss) / 2**20, 1) if rss else None,
+            "end": round(rss[-1] / 2**20, 1) if rss else None,
+        },
+        "memory_timeline": [(t, round(b / 2**20, 1)) for t, b in mem],
+    }
+
+
+def _print_table(results: dict) -> None:
+    print(f"{'Variante':<8} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'RSS MiB':>14} {'Upstream':>9}")
+    for name, r in results.items():
+        lat, rss = r["latency"], r["rss_mib"]
+        print(f"{name:<8} {r['throughput_rps']:>8.1f} {lat.get('p50_ms', 0):>9.1f} {lat.get('p95_ms', 0):>9.1f} "
+              f"{lat.get('p99_ms', 0):>9.1f} {str(rss['start']) + '→' + str(rss['peak']):>14} "
+              f"{r['upstream'].get('GET /public_power', 0):>9}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--variants", default="sync,cached", help="Kommagetrennt aus " + ", ".join(VARIANTS))
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--duration", type=float, default=20.0, help="Messdauer in Sekunden")
+    ap.add_argument("--warmup", type=float, default=2.0, help="Sekunden, die nicht mitgezählt werden")
+    ap.add_argument("--latency-ms", type=float, default=100.0, help="Latenz des Stub-Upstreams")
+    ap.add_argument("--jitter-ms", type=float, default=30.0)
+    ap.add_argument("--bandwidth-kbps", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path, default=Path("load_server.json"))
+    args = ap.parse_args(argv)
+
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = [v for v in variants if v not in VARIANTS]
+    if unknown:
+        ap.error(f"Unbekannte Variante(n): {', '.join(unknown)}")
+    stub_args = ["--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+                 "--bandwidth-kbps", str(args.bandwidth_kbps), "--error-rate", str(args.error_rate),
+                 "--seed", str(args.seed)]
+
+    results = {}
+    for name in variants:
+        print(f"{name}: {args.concurrency} Clients, {args.duration:.0f} s …", file=sys.stderr)
+        results[name] = run_variant(name, concurrency=args.concurrency, duration=args.duration,
+                                    warmup=args.warmup, stub_args=stub_args, seed=args.seed)
+    _print_table(results)
+
+    doc = {
+        "benchmark": "load_server",
+        "created": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "mix": MIX,
+        "args": vars(args) | {"out": str(args.out)},
+        "results": results,
+    }
+    args.out.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"Ergebnis: {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+# ec_cache.py
+# -*- coding: utf-8 -*-
+"""
+Prozessweiter Cache für aufbereitete Energy-Charts-Daten.
+- Schlüssel: (start, end, country)
+- TTL abhängig vom Alter der Daten: abgeschlossene Zeiträume leben länger
+- Gleichzeitige Anfragen auf denselben Schlüssel lösen nur EINEN Upstream-Abruf aus
+- Geteilt von allen Sessions/Requests eines Server-Prozesses (Streamlit, FastAPI)
+
+Achtung: Gecachte DataFrames werden zwischen Sessions geteilt und dürfen
+vom Aufrufer nicht verändert werden (bei Bedarf .copy()).
+"""
+from __future__ import annotations
+import datetime as dt
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator, Tuple
+
+import pandas as pd
+
+from ec_fetch import Countries, _to_date, chunk_ranges
+
+# TTLs in Sekunden
+TTL_RECENT_S = 5 * 60            # Zeitraum reicht in die letzten Tage: Werte werden noch nachgeliefert
+TTL_SETTLED_S = 6 * 60 * 60      # einige Tage alt: nur noch seltene Korrekturen
+TTL_ARCHIVE_S = 7 * 24 * 60 * 60  # älter als ARCHIVE_DAYS: praktisch unveränderlich
+
+RECENT_DAYS = 2
+ARCHIVE_DAYS = 30
+MAX_ENTRIES = 128
+
+# Progressives Laden: höchstens so viele Blöcke, jeder mindestens eine Woche
+PROGRESSIVE_MAX_CHUNKS = 12
+PROGRESSIVE_MIN_CHUNK_DAYS = 7
+
+
+def ttl_for_range(end: str | dt.date | dt.datetime, today: dt.date | None = None) -> float:
+    """TTL für einen Zeitraum [start, end) anhand des Alters seines Endes."""
+    e = _to_date(end)
+    today = today or dt.date.today()
+    age_days = (today - e).days
+    if age_days < RECENT_DAYS:
+        return TTL_RECENT_S
+    if age_days < ARCHIVE_DAYS:
+        return TTL_SETTLED_S
+    return TTL_ARCHIVE_S
+
+
+class TTLCache:
+    """Thread-sicherer LRU-Cache mit TTL pro Eintrag und Single-Flight-Laden."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, list] = {}  # key -> [Lock, Anzahl Interessenten]
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: Hashable) -> tuple[bool, Any]:
+        # Aufruf nur mit gehaltenem self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires, value = entry
+        if expires <= self._clock():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: float) -> Any:
+        """Liefert den gecachten Wert oder lädt ihn (pro Schlüssel höchstens ein Loader gleichzeitig).
+        Schlägt der Loader fehl, bleibt der Schlüssel-Lock belegt, solange noch jemand wartet:
+        der nächste Wartende prüft erneut und lädt allein – kein paralleler zweiter Versuch."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            slot = self._inflight.get(key)
+            if slot is None:
+                slot = self._inflight[key] = [threading.Lock(), 0]
+            slot[1] += 1
+
+        try:
+            with slot[0]:
+                # Ein paralleler Aufrufer hat den Wert evtl. gerade geladen
+                with self._lock:
+                    found, value = self._lookup(key)
+                    if found:
+                        return value
+                value = loader()
+                with self._lock:
+                    self.misses += 1
+                    self._store(key, value, ttl)
+                return value
+        finally:
+            # Slot erst freigeben, wenn niemand mehr daran wartet (auch nach Fehlern)
+            with self._lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    self._inflight.pop(key, None)
+
+    def peek(self, key: Hashable) -> tuple[bool, Any]:
+        """(gefunden, Wert) ohne zu laden."""
+        with self._lock:
+            return self._lookup(key)
+
+    def put(self, key: Hashable, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def _store(self, key: Hashable, value: Any, ttl: float) -> None:
+        # Aufruf nur mit gehaltenem self._lock
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def frames_fingerprint(*frames: pd.DataFrame | None) -> str:
+    """Inhaltsbasierter Fingerprint (Spalten + Werte) mehrerer Frames – als Cache-Schlüssel."""
+    h = hashlib.blake2b(digest_size=16)
+    for df in frames:
+        if df is None:
+            h.update(b"\x00")
+            continue
+        h.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+# Ein Cache pro Prozess – von allen Sessions geteilt
+POWER_CACHE = TTLCache()
+
+
+def load_power_frames(
+    start: str | dt.date | dt.datetime,
+    end: str | dt.date | dt.datetime,
+    country=Countries.GERMANY,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """fetch_public_power + transform_df mit prozessweitem Cache (Stufen über ec_pipeline,
+    dort zusätzlich auf Platte memoisiert).
+    Rückgabe wie transform_df: (erzeuger, erzeugerCombined, ausgleich, aggregated)."""
+    s = _to_date(start)
+    e = _to_date(end)
+    if e <= s:
+        raise ValueError("end muss nach start liegen (exklusiv).")
+
+    def _load():
+        from ec_pipeline import PIPELINE  # spät: ec_pipeline baut auf ec_cache auf
+        return PIPELINE.frames(s, e, country=country)
+
+    return POWER_CACHE.get_or_load((s, e, country), _load, ttl=ttl_for_range(e))
+
+
+def iter_power_frames_progressive(
+    start: str | dt.date | dt.datetime,
+    end: str | dt.date | dt.datetime,
+    country=Countries.GERMANY,
+) -> Iterator[tuple[int, int, Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]]]:
+    """Lädt [start, end) blockweise, neuester Block zuerst, und liefert nach jedem
+    Block (fertig, gesamt, frames) mit allen bisher geladenen Daten (chronologisch).
+    Jeder Block wird einzeln gecacht; das Gesamtergebnis zusätzlich unter (start, end, country)."""
+    s = _to_date(start)
+    e = _to_date(end)
+    found, frames = POWER_CACHE.peek((s, e, country))
+    if found:
+        yield 1, 1, frames
+        return
+
+    span_days = (e - s).days
+    chunk_days = max(PROGRESSIVE_MIN_CHUNK_DAYS, -(-span_days // PROGRESSIVE_MAX_CHUNKS))
+    chunks = chunk_ranges(s, e, chunk_days=chunk_days, newest_first=True)
+    parts: list[tuple] = []
+    for i, (cs, ce) in enumerate(chunks, start=1):
+        parts.insert(0, load_power_frames(cs, ce, country=country))  # älter -> vorne
+        frames = tuple(
+            pd.concat([p[k] for p in parts], ignore_index=True) if len(parts) > 1 else parts[0][k]
+            for k in range(4)
+        )
+        yield i, len(chunks), frames
+
+    POWER_CACHE.put((s, e, country), frames, ttl=ttl_for_range(e))
@@ -0,0 +1,280 @@
+# ec_capacity.py
+# -*- coding: utf-8 -*-
+"""
+Kapazitätsfaktoren je Erzeugungsart: Erzeugung (public_power, MW) / installierte Leistung (installed_power, GW).
+- installed_power wird einmal je Land und Zeitschritt geladen und einen Tag lang gecacht (ändert sich
+  höchstens monatlich); Standard: monatlich für Deutschland (nur dort verfügbar), sonst jährlich
+- Die installierte Leistung gilt ab Beginn ihres Monats/Jahres und wird vorwärts auf die
+  Viertelstunden-Zeitachse der Erzeugung übertragen (as-of, searchsorted)
+- Erzeugung kommt monatsweise aus der Pipeline (Stufe "parsed", je Kalendermonat gecacht –
+  auch über verschiedene Zeiträume hinweg)
+- Rechnung als Matrix (Zeitpunkte × Arten); die ausgerichteten Matrizen werden je Zeitraum gecacht
+  (TTL wie die Erzeugung, höchstens wie installed_power) samt Präfixsummen; Tabellen je Jahr/Monat
+  (energiegewichtet: Summe Erzeugung / Summe installierte Leistung) sind dann nur noch Differenzen
+  an den Periodengrenzen – aus dem Cache wenige ms, auch über viele Jahre
+
+Aufruf:
+    python ec_capacity.py --start 2022-01-01 --end 2025-01-01
+    python ec_capacity.py --start 2024-01-01 --end 2025-01-01 --period month --csv cf_2024.csv
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import re
+import sys
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from ec_cache import TTLCache, ttl_for_range
+from ec_fetch import Countries, _epoch, _to_date, asof_indexer
+from ec_profile import stage
+from app.api import APIRequestError, EnergyChartsAPI, ValidationError
+from app.enums import TimeSteps
+
+TTL_INSTALLED_S = 24 * 60 * 60
+INSTALLED_CACHE = TTLCache(max_entries=32)
+MATRIX_CACHE = TTLCache(max_entries=32)
+
+# Name in /installed_power -> Spalten in /public_power, deren Summe dazu gehört.
+# Nicht aufgeführte Namen werden genommen, wenn es in public_power eine gleichnamige Spalte gibt.
+GENERATION_FOR: dict[str, list[str]] = {
+    "Lignite": ["Fossil brown coal / lignite"],
+    "Hard coal": ["Fossil hard coal"],
+    "Oil": ["Fossil oil"],
+    "Gas": ["Fossil gas", "Fossil coal-derived gas"],
+    "Hydro": ["Hydro Run-of-River", "Hydro water reservoir"],
+    "Pumped storage": ["Hydro pumped storage"],
+    "Solar": ["Solar"],
+    "Solar DC": ["Solar"],
+    "Solar AC": ["Solar"],
+}
+PERIODS = ("year", "month")
+
+
+class InstalledPower(NamedTuple):
+    time_step: TimeSteps
+    starts: np.ndarray          # int64, Beginn des Monats/Jahres (UTC), aufsteigend
+    gw: dict[str, np.ndarray]   # je Art float32, NaN = keine Angabe
+
+
+class CapacityMatrix(NamedTuple):
+    """Erzeugung und installierte Leistung auf derselben Zeitachse (geteilt, schreibgeschützt)."""
+    ts: np.ndarray       # int64 unix_seconds
+    names: list[str]     # Arten (Namen aus installed_power)
+    gen: np.ndarray      # MW, Zeitpunkte × Arten
+    cap: np.ndarray      # MW, Zeitpunkte × Arten, NaN vor der ersten Angabe
+    cum_gen: np.ndarray  # Präfixsummen (Zeitpunkte + 1) × Arten, nur wo gen und cap bekannt
+    cum_cap: np.ndarray
+
+
+# ---------------------------
+# Installierte Leistung
+# ---------------------------
+def _period_start(label: str) -> dt.date:
+    """'2024', '03.2024', '2024-03' oder '2024-03-01' -> Monats-/Jahresbeginn."""
+    label = str(label).strip()
+    m = re.fullmatch(r"(\d{4})", label)
+    if m:
+        return dt.date(int(m.group(1)), 1, 1)
+    m = re.fullmatch(r"(\d{1,2})\.(\d{4})", label)
+    if m:
+        return dt.date(int(m.group(2)), int(m.group(1)), 1)
+    m = re.fullmatch(r"(\d{4})-(\d{1,2})(?:-\d{1,2})?", label)
+    if m:
+        return dt.date(int(m.group(1)), int(m.group(2)), 1)
+    raise ValueError(f"Unbekanntes Zeitformat in installed_power: '{label}'")
+
+
+def parse_installed_power(resp: dict, time_step: TimeSteps) -> InstalledPower:
+    """API-Antwort -> InstalledPower; Leistungsarten in GW (Speicherkapazität in GWh fällt weg)."""
+    labels = resp.get("time") or []
+    starts = np.array([_epoch(_period_start(t)) for t in labels], dtype=np.int64)
+    order = np.argsort(starts, kind="stable")
+    gw: dict[str, np.ndarray] = {}
+    for entry in resp.get("production_types") or []:
+        name = entry.get("name") if isinstance(entry, dict) else None
+        if not name or "capacity" in name.lower():
+            continue
+        vals = np.full(len(starts), np.nan, dtype=np.float32)
+        data = [np.nan if v is None else v for v in (entry.get("data") or [])[:len(starts)]]
+        vals[:len(data)] = data
+        gw[name] = vals[order]
+    return InstalledPower(time_step, starts[order], gw)
+
+
+def load_installed_power(country=Countries.GERMANY, time_step: TimeSteps | None = None) -> InstalledPower:
+    """installed_power mit Cache (TTL_INSTALLED_S). Ohne time_step: monatlich für DE, sonst jährlich;
+    liefert die API monatlich nichts (leer, 422, 404), wird auf jährlich ausgewichen."""
+    if time_step is None:
+        step = TimeSteps.MONTHLY if country == Countries.GERMANY else TimeSteps.YEARLY
+        try:
+            return load_installed_power(country, step)
+        except (ValidationError, APIRequestError, RuntimeError) as ex:
+            if step == TimeSteps.YEARLY or (isinstance(ex, APIRequestError) and ex.status_code != 404):
+                raise
+            return load_installed_power(country, TimeSteps.YEARLY)
+
+    def _load() -> InstalledPower:
+        with stage("fetch", endpoint="installed_power", country=country.value, time_step=time_step.value):
+            resp = EnergyChartsAPI().get_installed_power(country, time_step, False)
+        if not resp or not resp.get("time"):
+            raise RuntimeError("Leere Antwort vom Submodul (get_installed_power).")
+        return parse_installed_power(resp, time_step)
+
+    return INSTALLED_CACHE.get_or_load(("installed_power", country, time_step), _load, ttl=TTL_INSTALLED_S)
+
+
+# ---------------------------
+# Kapazitätsfaktoren
+# ---------------------------
+def _next_period(d: dt.date, period: str) -> dt.date:
+    if period == "month":
+        return dt.date(d.year + d.month // 12, d.month % 12 + 1, 1)
+    return dt.date(d.year + 1, 1, 1)
+
+
+def _period_starts(s: dt.date, e: dt.date, period: str) -> list[dt.date]:
+    """Beginn aller Jahre/Monate, die [s, e) berühren."""
+    out = []
+    d = dt.date(s.year, s.month if period == "month" else 1, 1)
+    while d < e:
+        out.append(d)
+        d = _next_period(d, period)
+    return out
+
+
+def _generation(start: dt.date, end: dt.date, country) -> tuple[np.ndarray, pd.DataFrame]:
+    """Erzeugung für [start, end), monatsweise über die Pipeline geladen: ganze Kalendermonate haben
+    stabile Schlüssel, überlappende Zeiträume teilen sich so die gecachten Monate."""
+    from ec_pipeline import PIPELINE  # spät: ec_pipeline zieht die Render-Module nach
+    parts = [PIPELINE.get("parsed", start=m, end=_next_period(m, "month"), country=country)
+             for m in _period_starts(start, end, "month")]
+    df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+    ts = df["timestamp"].to_numpy("datetime64[s]").astype(np.int64)
+    lo, hi = np.searchsorted(ts, [_epoch(start), _epoch(end)])
+    return ts[lo:hi], df.iloc[lo:hi]
+
+
+def capacity_matrix(
+    start: str | dt.date | dt.datetime,
+    end: str | dt.date | dt.datetime,
+    country=Countries.GERMANY,
+    time_step: TimeSteps | None = None,
+) -> CapacityMatrix:
+    """Erzeugung und installierte Leistung (MW) als Matrizen Zeitpunkte × Arten, mit Cache.
+    Nur Arten, zu denen es Erzeugungsdaten gibt."""
+    s = _to_date(start)
+    e = _to_date(end)
+    if e <= s:
+        raise ValueError("end muss nach start liegen (exklusiv).")
+    inst = load_installed_power(country, time_step)
+    ttl = min(ttl_for_range(e), TTL_INSTALLED_S)
+    return MATRIX_CACHE.get_or_load((s, e, country, inst.time_step), lambda: _align(inst, s, e, country), ttl=ttl)
+
+
+def _align(inst: InstalledPower, s: dt.date, e: dt.date, country) -> CapacityMatrix:
+    ts, df = _generation(s, e, country)
+    names, gen_cols = [], []
+    for name in inst.gw:
+        cols = [c for c in GENERATION_FOR.get(name, [name]) if c in df.columns]
+        if cols:
+            names.append(name)
+            gen_cols.append(cols)
+    gen = np.empty((len(ts), len(names)), dtype=np.float64)
+    for j, cols in enumerate(gen_cols):
+        # Teilspalten ohne Wert zählen als 0, nur wenn alle fehlen -> NaN
+        block = df[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        gen[:, j] = np.where(np.isnan(block).all(axis=1), np.nan, np.nansum(block, axis=1))
+
+    # installierte Leistung vorwärts auf die Zeitachse (gilt bis zur nächsten Angabe)
+    idx = asof_indexer(ts, inst.starts, tolerance_s=np.iinfo(np.int64).max)
+    cap = np.full((len(ts), len(names)), np.nan)
+    if len(inst.starts) and names:
+        table = np.column_stack([inst.gw[n] for n in names]).astype(np.float64) * 1000.0
+        cap = table[np.maximum(idx, 0)]
+        cap[idx < 0] = np.nan
+
+    valid = ~(np.isnan(gen) | np.isnan(cap))
+    zero = np.zeros((1, len(names)))
+    cum_gen = np.concatenate([zero, np.cumsum(np.where(valid, gen, 0.0), axis=0)])
+    cum_cap = np.concatenate([zero, np.cumsum(np.where(valid, cap, 0.0), axis=0)])
+    for arr in (ts, gen, cap, cum_gen, cum_cap):
+        arr.setflags(write=False)
+    return CapacityMatrix(ts, names, gen, cap, cum_gen, cum_cap)
+
+
+def capacity_factors(
+    start: str | dt.date | dt.datetime,
+    end: str | dt.date | dt.datetime,
+    country=Countries.GERMANY,
+    time_step: TimeSteps | None = None,
+) -> pd.DataFrame:
+    """Kapazitätsfaktor je Zeitpunkt und Art (0..1, float32), Index `unix_seconds` wie
+    ec_fetch.fetch_power_price_cbet; Spalten = Namen aus installed_power."""
+    m = capacity_matrix(start, end, country, time_step)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cf = np.where(m.cap > 0, m.gen / m.cap, np.nan)
+    return pd.DataFrame(cf.astype(np.float32), columns=m.names, index=pd.Index(m.ts, name="unix_seconds"))
+
+
+def capacity_factor_table(
+    start: str | dt.date | dt.datetime,
+    end: str | dt.date | dt.datetime,
+    country=Countries.GERMANY,
+    period: str = "year",
+    time_step: TimeSteps | None = None,
+) -> pd.DataFrame:
+    """Kapazitätsfaktor je Jahr/Monat und Art: Summe Erzeugung / Summe installierte Leistung über alle
+    Zeitpunkte, an denen beides bekannt ist (= Vollaststunden / Stunden im Zeitraum)."""
+    if period not in PERIODS:
+        raise ValueError(f"period muss eines von {PERIODS} sein.")
+    s, e = _to_date(start), _to_date(end)
+    m = capacity_matrix(s, e, country, time_step)
+    periods = _period_starts(s, e, period)
+    labels = [f"{d:%Y-%m}" if period == "month" else f"{d:%Y}" for d in periods]
+    # Zeilengrenzen je Periode (ts aufsteigend)
+    edges = np.searchsorted(m.ts, [_epoch(d) for d in periods] + [_epoch(e)])
+    sums_g = m.cum_gen[edges[1:]] - m.cum_gen[edges[:-1]]
+    sums_c = m.cum_cap[edges[1:]] - m.cum_cap[edges[:-1]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cf = np.where(sums_c > 0, sums_g / sums_c, np.nan)
+    return pd.DataFrame(cf.astype(np.float32), columns=m.names, index=pd.Index(labels, name=period))
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--start", type=_to_date, required=True, help="YYYY-MM-DD")
+    ap.add_argument("--end", type=_to_date, required=True, help="YYYY-MM-DD (exklusiv)")
+    ap.add_argument("--country", default="de")
+    ap.add_argument("--period", choices=PERIODS, default="year")
+    ap.add_argument("--time-step", choices=[t.value for t in TimeSteps], default=None,
+                    help="Auflösung der installierten Leistung (Standard: monthly für de, sonst yearly)")
+    ap.add_argument("--csv", default=None, help="Tabelle zusätzlich als CSV ablegen")
+    args = ap.parse_args(argv)
+    if args.end <= args.start:
+        ap.error("--end muss nach --start liegen")
+    try:
+        country = Countries(args.country.lower())
+    except ValueError:
+        ap.error(f"Unbekanntes Land: {args.country}")
+    time_step = TimeSteps(args.time_step) if args.time_step else None
+
+    t0 = time.perf_counter()
+    table = capacity_factor_table(args.start, args.end, country, args.period, time_step)
+    t1 = time.perf_counter()
+    capacity_factor_table(args.start, args.end, country, args.period, time_step)
+    t2 = time.perf_counter()
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print((table.astype("float64") * 100).round(1).to_string(na_rep="–"))
+    print(f"Kapazitätsfaktoren in % – erster Aufruf {t1 - t0:.2f} s, aus dem Cache {(t2 - t1) * 1e3:.1f} ms",
+          file=sys.stderr)
+    if args.csv:
+        table.to_csv(args.csv)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
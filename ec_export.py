@@ -0,0 +1,265 @@
+# ec_export.py
+# -*- coding: utf-8 -*-
+"""
+Bulk-Export historischer public_power-Daten als partitioniertes Parquet (Land × Monat).
+- Raster: Länder × Kalendermonate ab --start (Standard 2015-01) bis zum letzten vollständigen Monat
+- Abruf parallel, aber höflich: höchstens --concurrency gleichzeitig, mindestens --interval s zwischen
+  zwei Anfragen, Wiederholung mit Backoff bei Netz-/Serverfehlern und leeren/unlesbaren Antworten
+- Gleicher Weg wie die Apps: EnergyChartsAPI → make_dataframe → transform_df; je Monat eine Datei mit
+  Zeitstempel, Original-Erzeugern, zusammengefassten Erzeugern, Ausgleich und Stromverbrauch
+- Ablage (Hive-Partitionen): OUT/country=de/year=2015/2015-01.parquet, zstd-komprimiert
+- Fortsetzen nach Abbruch: fertige Dateien und leere Monate (422/404, _manifest.jsonl) werden übersprungen;
+  Dateien entstehen atomar (tmp → rename)
+- Fortschritt: erledigt/gesamt, Anfragen/s, Zeilen/s, MiB, ETA
+
+Aufruf:
+    python ec_export.py --out data/public_power                    # alle Länder ab 2015
+    python ec_export.py --out data/public_power --country de --country fr --start 2020-01
+    pd.read_parquet("data/public_power", filters=[("country", "==", "de")])
+
+Benötigt pyarrow (pip install pyarrow).
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import NamedTuple
+
+import pandas as pd
+import requests
+
+from ec_fetch import Countries, fetch_public_power_raw, parse_public_power
+from ec_transform import COL_TIMESTAMP, transform_df
+
+# Optional: Parquet-Backend
+try:
+    import pyarrow  # type: ignore  # noqa: F401
+except Exception:
+    pyarrow = None
+
+try:
+    from app.api import APIRequestError, ValidationError  # type: ignore
+except Exception:
+    class APIRequestError(Exception):
+        status_code = None
+
+    class ValidationError(Exception):
+        pass
+
+DEFAULT_START = dt.date(2015, 1, 1)
+MANIFEST = "_manifest.jsonl"
+COMPRESSION = "zstd"
+
+
+class Task(NamedTuple):
+    country: Countries
+    start: dt.date
+    end: dt.date  # exklusiv
+
+
+def month_starts(start: dt.date, end: dt.date) -> list[dt.date]:
+    """Monatsanfänge in [start, end)."""
+    out = []
+    d = dt.date(start.year, start.month, 1)
+    while d < end:
+        out.append(d)
+        d = dt.date(d.year + d.month // 12, d.month % 12 + 1, 1)
+    return out
+
+
+def build_grid(countries: list[Countries], start: dt.date, end: dt.date) -> list[Task]:
+    """Land × Monat; neueste Monate zuerst (die sind am häufigsten gefragt)."""
+    months = month_starts(start, end)
+    tasks = []
+    for m in reversed(months):
+        m_end = dt.date(m.year + m.month // 12, m.month % 12 + 1, 1)
+        tasks += [Task(c, m, min(m_end, end)) for c in countries]
+    return tasks
+
+
+def part_path(out: Path, task: Task) -> Path:
+    return out / f"country={task.country.value}" / f"year={task.start.year}" / f"{task.start:%Y-%m}.parquet"
+
+
+def _task_id(task: Task) -> str:
+    return f"{task.country.value}/{task.start:%Y-%m}"
+
+
+def load_manifest(out: Path) -> set[str]:
+    """Monate, die als leer/ungültig abgeschlossen sind (kein Parquet, aber nicht erneut abrufen)."""
+    done: set[str] = set()
+    path = out / MANIFEST
+    if path.exists():
+        for line in path.read_text("utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # abgebrochene letzte Zeile
+            if entry.get("status") == "empty":
+                done.add(entry["task"])
+    return done
+
+
+class Polite:
+    """Mindestabstand zwischen zwei Anfrage-Starts über alle Threads."""
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval_s
+        if start > now:
+            time.sleep(start - now)
+
+
+def month_frame(resp: dict, task: Task) -> pd.DataFrame:
+    """Eine Datei je Monat: alle vier transform_df-Frames nebeneinander (gleiche Zeitachse)."""
+    df_raw = parse_public_power(resp, task.start, task.end)
+    erzeuger, combined, ausgleich, aggregated = transform_df(df_raw)
+    parts = [erzeuger] + [f.drop(columns=[COL_TIMESTAMP]) for f in (combined, ausgleich, aggregated)]
+    df = pd.concat(parts, axis=1)
+    num = df.columns.drop(COL_TIMESTAMP)
+    df[num] = df[num].apply(pd.to_numeric, errors="coerce").astype("float32")
+    return df
+
+
+def export_task(task: Task, out: Path, polite: Polite, retries: int = 4, backoff_s: float = 2.0) -> dict:
+    """Einen Monat laden und schreiben. Rückgabe: Manifest-Eintrag (Fehler werden nicht geworfen)."""
+    for attempt in range(retries + 1):
+        polite.wait()
+        try:
+            resp = fetch_public_power_raw(task.start, task.end, country=task.country)
+            break
+        except ValidationError as ex:
+            # 422: für diesen Monat gibt es (noch) keine Daten
+            return {"task": _task_id(task), "status": "empty", "reason": str(ex)[:200]}
+        except (APIRequestError, RuntimeError, requests.RequestException) as ex:
+            # leere/unlesbare Antwort (Proxy-, Wartungsseite) ist vorübergehend: erneut versuchen,
+            # am Ende "error" – der nächste Lauf holt den Monat dann noch einmal
+            if getattr(ex, "status_code", None) == 404:
+                return {"task": _task_id(task), "status": "empty", "reason": "404"}
+            if attempt == retries:
+                return {"task": _task_id(task), "status": "error", "reason": str(ex)[:200]}
+            time.sleep(backoff_s * 2 ** attempt)
+
+    path = part_path(out, task)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        df = month_frame(resp, task)
+        if df.empty:
+            return {"task": _task_id(task), "status": "empty", "reason": "keine Zeilen"}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp, engine="pyarrow", compression=COMPRESSION, index=False)
+        os.replace(tmp, path)
+    except Exception as ex:
+        # Aufbereiten/Schreiben fehlgeschlagen: nur dieser Monat, das Raster läuft weiter
+        tmp.unlink(missing_ok=True)
+        return {"task": _task_id(task), "status": "error", "reason": f"{type(ex).__name__}: {ex}"[:200]}
+    return {"task": _task_id(task), "status": "ok", "rows": len(df), "bytes": path.stat().st_size}
+
+
+def _fmt_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    h, rest = divmod(seconds, 3600)
+    return f"{h}:{rest // 60:02d}:{rest % 60:02d}"
+
+
+def run(tasks: list[Task], out: Path, concurrency: int, interval_s: float, retries: int) -> dict:
+    out.mkdir(parents=True, exist_ok=True)
+    empty = load_manifest(out)
+    todo = [t for t in tasks if _task_id(t) not in empty and not part_path(out, t).exists()]
+    skipped = len(tasks) - len(todo)
+    print(f"{len(tasks)} Monate im Raster, {skipped} bereits erledigt, {len(todo)} offen", file=sys.stderr)
+
+    polite = Polite(interval_s)
+    totals = {"ok": 0, "empty": 0, "error": 0, "rows": 0, "bytes": 0}
+    t0 = time.perf_counter()
+    with open(out / MANIFEST, "a", encoding="utf-8") as manifest, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = set()
+        queue = iter(todo)
+        # Nur so viele Aufgaben einreichen wie Worker: Abbruch (Ctrl+C) wartet nicht auf das ganze Raster
+        for task in queue:
+            pending.add(pool.submit(export_task, task, out, polite, retries))
+            if len(pending) >= concurrency:
+                break
+        done_n = 0
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                entry = fut.result()
+                done_n += 1
+                totals[entry["status"]] += 1
+                totals["rows"] += entry.get("rows", 0)
+                totals["bytes"] += entry.get("bytes", 0)
+                manifest.write(json.dumps(entry) + "\n")
+                manifest.flush()
+                elapsed = time.perf_counter() - t0
+                rate = done_n / elapsed if elapsed else 0.0
+                eta = (len(todo) - done_n) / rate if rate else 0.0
+                print(f"[{done_n}/{len(todo)}] {entry['task']} {entry['status']:<5} "
+                      f"{rate:.2f} Monate/s, {totals['rows'] / elapsed:,.0f} Zeilen/s, "
+                      f"{totals['bytes'] / 2**20:.1f} MiB, ETA {_fmt_eta(eta)}", file=sys.stderr)
+                nxt = next(queue, None)
+                if nxt is not None:
+                    pending.add(pool.submit(export_task, nxt, out, polite, retries))
+    totals["seconds"] = round(time.perf_counter() - t0, 1)
+    return totals
+
+
+def _month(text: str) -> dt.date:
+    try:
+        y, m = map(int, text.split("-")[:2])
+        return dt.date(y, m, 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ungültiger Monat '{text}' (erwartet YYYY-MM)")
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--out", type=Path, required=True, help="Zielverzeichnis des Parquet-Datensatzes")
+    ap.add_argument("--country", action="append", default=[],
+                    help="Ländercode (z. B. de, fr); mehrfach möglich, Standard: alle")
+    ap.add_argument("--start", type=_month, default=DEFAULT_START, help="erster Monat YYYY-MM (Standard 2015-01)")
+    ap.add_argument("--end", type=_month, default=None,
+                    help="erster NICHT exportierter Monat YYYY-MM (Standard: aktueller Monat)")
+    ap.add_argument("--concurrency", type=int, default=2, help="gleichzeitige Anfragen (höflich bleiben)")
+    ap.add_argument("--interval", type=float, default=0.5, help="Mindestabstand zwischen Anfragen in s")
+    ap.add_argument("--retries", type=int, default=4)
+    args = ap.parse_args(argv)
+
+    if pyarrow is None:
+        ap.error("pyarrow fehlt (pip install pyarrow)")
+    try:
+        countries = [Countries(c.lower()) for c in args.country] or list(Countries)
+    except ValueError as ex:
+        ap.error(f"Unbekanntes Land: {ex}")
+    today = dt.date.today()
+    end = args.end or dt.date(today.year, today.month, 1)
+    if end <= args.start:
+        ap.error("--end muss nach --start liegen")
+
+    tasks = build_grid(countries, args.start, end)
+    try:
+        totals = run(tasks, args.out, max(1, args.concurrency), max(0.0, args.interval), args.retries)
+    except KeyboardInterrupt:
+        print("Abgebrochen – erneuter Aufruf setzt fort.", file=sys.stderr)
+        return 130
+    print(f"fertig: {totals['ok']} Dateien, {totals['empty']} leer, {totals['error']} Fehler, "
+          f"{totals['rows']:,} Zeilen, {totals['bytes'] / 2**20:.1f} MiB in {totals['seconds']} s", file=sys.stderr)
+    return 1 if totals["error"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,18 +1,24 @@
 # ec_fetch.py
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+import contextvars
 import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
+import numpy as np
 import pandas as pd
 
+from ec_profile import stage
+from ec_trace import traced
+
 # Submodul-Pfad
 BASE_DIR = Path(__file__).resolve().parent
 SUBMODULE_ROOT = (BASE_DIR / "libs" / "energy-charts").resolve()
 sys.path.insert(0, str(SUBMODULE_ROOT))
 
 from app.api import EnergyChartsAPI
-from app.enums import Countries
+from app.enums import BindingZones, Countries
 from app.parser import make_dataframe
 
 
@@ -32,23 +38,46 @@ def _to_date(d: str | dt.date | dt.datetime) -> dt.date:
     return dt.date.fromisoformat(str(d))
 
 
+@traced("fetch_public_power")
 def fetch_public_power(
     start: str | dt.date | dt.datetime,
     end: str | dt.date | dt.datetime,
     country=Countries.GERMANY,
 ) -> pd.DataFrame:
     """Hole Public Power Daten für beliebiges Zeitfenster [start, end)."""
+    resp = fetch_public_power_raw(start, end, country=country)
+    return parse_public_power(resp, start, end)
+
+
+def fetch_public_power_raw(
+    start: str | dt.date | dt.datetime,
+    end: str | dt.date | dt.datetime,
+    country=Countries.GERMANY,
+) -> dict:
+    """Nur der Upstream-Abruf: unveränderte API-Antwort für [start, end)."""
     s = _to_date(start)
     e = _to_date(end)
     if e <= s:
         raise ValueError("end muss nach start liegen (exklusiv).")
 
     api = EnergyChartsAPI()
-    resp = api.get_public_power(country=country, start=s.isoformat(), end=e.isoformat(), subtype=None)
+    with stage("fetch", start=s, end=e, country=getattr(country, "value", country)):
+        resp = api.get_public_power(country=country, start=s.isoformat(), end=e.isoformat(), subtype=None)
     if not resp:
         raise RuntimeError("Leere Antwort vom Submodul (get_public_power).")
+    return resp
+
 
-    df_raw = make_dataframe(resp)
+def parse_public_power(
+    resp: dict,
+    start: str | dt.date | dt.datetime,
+    end: str | dt.date | dt.datetime,
+) -> pd.DataFrame:
+    """API-Antwort -> DataFrame, auf [start, end) beschnitten."""
+    s = _to_date(start)
+    e = _to_date(end)
+    with stage("parse"):
+        df_raw = make_dataframe(resp)
     if "timestamp" not in df_raw.columns:
         raise RuntimeError("Parser-Ergebnis enthält keine 'timestamp'-Spalte.")
 
@@ -56,6 +85,149 @@ def fetch_public_power(
     return df_raw.loc[mask].reset_index(drop=True)
 
 
+# ---------------------------
+# Power + Day-Ahead-Preis + grenzüberschreitender Handel auf einer Zeitachse
+# ---------------------------
+# Land -> Gebotszone für Day-Ahead-Preise (nur Länder mit eindeutiger Zone)
+DEFAULT_BZN = {
+    Countries.AUSTRIA: BindingZones.AUSTRIA,
+    Countries.BELGIUM: BindingZones.BELGIUM,
+    Countries.CZECH_REPUBLIC: BindingZones.CZECH_REPUBLIC,
+    Countries.FRANCE: BindingZones.FRANCE,
+    Countries.GERMANY: BindingZones.GERMANY_LUXEMBOURG,
+    Countries.HUNGARY: BindingZones.HUNGARY,
+    Countries.LUXEMBOURG: BindingZones.GERMANY_LUXEMBOURG,
+    Countries.NETHERLANDS: BindingZones.NETHERLANDS,
+    Countries.POLAND: BindingZones.POLAND,
+    Countries.SLOVENIA: BindingZones.SLOVENIA,
+    Countries.SWITZERLAND: BindingZones.SWITZERLAND,
+}
+PRICE_COL = "price_eur_mwh"
+CBET_PREFIX = "cbet_"
+DEFAULT_STEP_S = 3600  # Toleranz der as-of-Zuordnung, falls die Quelle nur einen Zeitpunkt hat
+
+
+def series_arrays(resp: dict, key: str) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """(unix_seconds int64, {Name: float32-Werte}) aus einer API-Antwort mit Listen wie
+    production_types/countries – direkt als Arrays, ohne DataFrame-Merges. null -> NaN."""
+    ts = np.asarray(resp.get("unix_seconds") or [], dtype=np.int64)
+    out: dict[str, np.ndarray] = {}
+    for entry in resp.get(key) or []:
+        if not isinstance(entry, dict) or not entry.get("name"):
+            continue
+        vals = np.full(len(ts), np.nan, dtype=np.float32)
+        data = np.asarray((entry.get("data") or [])[:len(ts)], dtype=np.float32)
+        vals[:len(data)] = data
+        out[entry["name"]] = vals
+    return ts, out
+
+
+def asof_indexer(target: np.ndarray, source: np.ndarray, tolerance_s: int | None = None) -> np.ndarray:
+    """Für jeden Zeitpunkt in target die Position des letzten source-Zeitpunkts <= target, -1 wenn keiner
+    oder wenn er tolerance_s oder weiter zurückliegt (Standard: Schrittweite von source). source aufsteigend."""
+    if not len(source):
+        return np.full(len(target), -1, dtype=np.int64)
+    if tolerance_s is None:
+        tolerance_s = int(np.median(np.diff(source))) if len(source) > 1 else DEFAULT_STEP_S
+    pos = np.searchsorted(source, target, side="right") - 1
+    ok = pos >= 0
+    ok[ok] = (target[ok] - source[pos[ok]]) < tolerance_s
+    return np.where(ok, pos, -1)
+
+
+def take_asof(values: np.ndarray, idx: np.ndarray) -> np.ndarray:
+    """values an den Positionen aus asof_indexer, NaN für -1."""
+    if not len(values):
+        return np.full(len(idx), np.nan, dtype=np.float32)
+    out = values[np.maximum(idx, 0)].astype(np.float32, copy=True)
+    out[idx < 0] = np.nan
+    return out
+
+
+def _call(endpoint: str, fn, *args) -> dict | None:
+    with stage("fetch", endpoint=endpoint):
+        return fn(*args)
+
+
+@traced("fetch_power_price_cbet")
+def fetch_power_price_cbet(
+    start: str | dt.date | dt.datetime,
+    end: str | dt.date | dt.datetime,
+    country=Countries.GERMANY,
+    bzn: BindingZones | None = None,
+) -> pd.DataFrame:
+    """Power (15 min), Day-Ahead-Preis (Gebotszone, stündlich) und Handel je Nachbar (cbet) für
+    [start, end) gleichzeitig laden und auf die Zeitachse der Power-Daten legen.
+    Preis/Handel werden as-of rückwärts zugeordnet (Wert des laufenden Intervalls), Lücken -> NaN.
+
+    Rückgabe: ein kompakter Frame, Index `unix_seconds` (int64, UTC), Spalten float32:
+    Erzeugungsarten (API-Namen), `price_eur_mwh` (falls Gebotszone bekannt), `cbet_<Nachbar>`.
+    Zeitstempel bei Bedarf: pd.to_datetime(df.index, unit="s")."""
+    s = _to_date(start)
+    e = _to_date(end)
+    if e <= s:
+        raise ValueError("end muss nach start liegen (exklusiv).")
+    bzn = bzn or DEFAULT_BZN.get(country)
+    a, b = s.isoformat(), e.isoformat()
+
+    calls = {
+        "public_power": lambda: EnergyChartsAPI().get_public_power(country=country, start=a, end=b, subtype=None),
+        "cbet": lambda: EnergyChartsAPI().get_cbet(country, a, b),
+    }
+    if bzn is not None:
+        calls["price"] = lambda: EnergyChartsAPI().get_price(bzn, a, b)
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        # Kontext mitgeben, damit Spans (ec_trace) unter dem Aufrufer hängen
+        futures = {name: pool.submit(contextvars.copy_context().run, _call, name, fn) for name, fn in calls.items()}
+        resp = {name: f.result() for name, f in futures.items()}
+    if not resp["public_power"]:
+        raise RuntimeError("Leere Antwort vom Submodul (get_public_power).")
+
+    ts, power = series_arrays(resp["public_power"], "production_types")
+    lo, hi = np.searchsorted(ts, [_epoch(s), _epoch(e)])
+    ts = ts[lo:hi]
+    cols: dict[str, np.ndarray] = {name: vals[lo:hi] for name, vals in power.items()}
+
+    if bzn is not None:
+        price = resp.get("price") or {}
+        p_ts = np.asarray(price.get("unix_seconds") or [], dtype=np.int64)
+        p_vals = np.asarray(price.get("price") or [], dtype=np.float32)[:len(p_ts)]
+        cols[PRICE_COL] = take_asof(p_vals, asof_indexer(ts, p_ts[:len(p_vals)]))
+
+    c_ts, flows = series_arrays(resp["cbet"] or {}, "countries")
+    idx = asof_indexer(ts, c_ts)
+    for name, vals in flows.items():
+        cols[CBET_PREFIX + name] = take_asof(vals, idx)
+
+    return pd.DataFrame(cols, index=pd.Index(ts, name="unix_seconds"))
+
+
+def _epoch(d: dt.date) -> int:
+    return int(dt.datetime(d.year, d.month, d.day, tzinfo=dt.timezone.utc).timestamp())
+
+
+def chunk_ranges(
+    start: str | dt.date | dt.datetime,
+    end: str | dt.date | dt.datetime,
+    chunk_days: int = 7,
+    newest_first: bool = True,
+) -> list[tuple[dt.date, dt.date]]:
+    """Zerlegt [start, end) in Teilfenster à chunk_days Tage (am Ende ausgerichtet).
+    Standard: neuester Block zuerst – für progressives Laden."""
+    s = _to_date(start)
+    e = _to_date(end)
+    if e <= s:
+        raise ValueError("end muss nach start liegen (exklusiv).")
+    step = dt.timedelta(days=max(1, int(chunk_days)))
+    out = []
+    ce = e
+    while ce > s:
+        cs = max(s, ce - step)
+        out.append((cs, ce))
+        ce = cs
+    return out if newest_first else out[::-1]
+
+
 def fetch_public_power_week_de(start=None, end=None) -> pd.DataFrame:
     if start is None or end is None:
         start, end = last_full_week()
@@ -0,0 +1,325 @@
+# ec_frequency.py
+# -*- coding: utf-8 -*-
+"""
+Netzfrequenz (Fraunhofer ISE, Sekundenauflösung) mit begrenztem Speicher verdichten.
+- Abruf tageweise (chunk_ranges); jede Antwort wird sofort in Arrays umgesetzt und wieder verworfen –
+  im Speicher liegt nie mehr als ein Tag Rohdaten, egal wie lang der Zeitraum ist
+- Je Zeitfenster (Standard 60 s) laufend min/max/Mittel/Standardabweichung/Anzahl, vektorisiert je Block;
+  ein an der Blockgrenze angeschnittenes Fenster wird mit dem nächsten Block zusammengeführt
+- Ereignisse: Abweichung von 50 Hz über dem Band (Standard ±0,1 Hz); Überschreitungen mit weniger als
+  --merge-gap s Abstand zählen als ein Ereignis, auch über Blockgrenzen hinweg
+- Aufbewahrt werden nur die Fenster-Kennzahlen, die Ereignisliste und die Rohwerte rund um jedes
+  Ereignis (± --context s)
+
+Aufruf:
+    python ec_frequency.py --start 2024-01-01 --end 2024-01-08
+    python ec_frequency.py --start 2024-01-01 --end 2024-02-01 --bucket 300 --band 0.15 --out data/frequency
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from ec_fetch import _epoch, _to_date, chunk_ranges
+from ec_profile import stage
+from app.api import EnergyChartsAPI
+from app.enums import Regions
+
+# Optional: Parquet-Ablage (sonst CSV)
+try:
+    import pyarrow  # type: ignore  # noqa: F401
+except Exception:
+    pyarrow = None
+
+NOMINAL_HZ = 50.0
+DEFAULT_BUCKET_S = 60
+DEFAULT_BAND_HZ = 0.1
+DEFAULT_CONTEXT_S = 60
+DEFAULT_MERGE_GAP_S = 10
+MAX_EVENT_SAMPLES = 4 * 3600  # Rohwerte je Ereignis begrenzen (lange Störungen)
+
+
+class FrequencyOverview(NamedTuple):
+    buckets: pd.DataFrame   # Index unix_seconds (Fensterbeginn): min_hz, max_hz, mean_hz, std_hz, n
+    events: pd.DataFrame    # je Ereignis: start, end, duration_s, direction, extreme_hz, samples_out, truncated
+    samples: pd.DataFrame   # Rohwerte um die Ereignisse: event, unix_seconds, hz
+    stats: dict             # Blöcke, Messwerte, größter Block
+
+
+# ---------------------------
+# Abruf
+# ---------------------------
+def iter_frequency_chunks(
+    start: str | dt.date | dt.datetime,
+    end: str | dt.date | dt.datetime,
+    region: Regions = Regions.UCTE,
+    chunk_days: int = 1,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """(unix_seconds int64, Hz float32) je Teilfenster, aufsteigend, auf das Teilfenster beschnitten."""
+    api = EnergyChartsAPI()
+    for cs, ce in chunk_ranges(start, end, chunk_days=chunk_days, newest_first=False):
+        with stage("fetch", endpoint="frequency", start=cs, end=ce) as info:
+            resp = api.get_frequency(region, cs.isoformat(), ce.isoformat()) or {}
+        ts = np.asarray(resp.get("unix_seconds") or [], dtype=np.int64)
+        hz = np.asarray([np.nan if v is None else v for v in (resp.get("data") or [])[:len(ts)]],
+                        dtype=np.float32)
+        del resp
+        ts = ts[:len(hz)]
+        lo, hi = np.searchsorted(ts, [_epoch(cs), _epoch(ce)])
+        info["samples"] = int(hi - lo)
+        yield ts[lo:hi], hz[lo:hi]
+
+
+# ---------------------------
+# Laufende Verdichtung
+# ---------------------------
+class FrequencyAggregator:
+    """Nimmt aufsteigende Blöcke (ts, hz) entgegen; Speicher wächst nur mit Fensterzahl und Ereignissen."""
+
+    def __init__(self, bucket_s: int = DEFAULT_BUCKET_S, band_hz: float = DEFAULT_BAND_HZ,
+                 context_s: int = DEFAULT_CONTEXT_S, merge_gap_s: int = DEFAULT_MERGE_GAP_S,
+                 nominal_hz: float = NOMINAL_HZ, max_event_samples: int = MAX_EVENT_SAMPLES):
+        if bucket_s <= 0:
+            raise ValueError("bucket_s muss > 0 sein.")
+        self.bucket_s = int(bucket_s)
+        self.band_hz = float(band_hz)
+        self.context_s = int(context_s)
+        self.merge_gap_s = int(merge_gap_s)
+        self.nominal_hz = float(nominal_hz)
+        self.max_event_samples = int(max_event_samples)
+        self.stats = {"chunks": 0, "samples": 0, "max_chunk": 0}
+        self._last_ts: int | None = None
+        # Fenster: fertige Teilergebnisse + das zuletzt angeschnittene
+        self._done: list[dict[str, np.ndarray]] = []
+        self._partial: dict[str, np.ndarray] | None = None
+        # Ereignisse: noch offene/Nachlauf sammelnde und abgeschlossene
+        self._tail_ts = np.empty(0, dtype=np.int64)
+        self._tail_hz = np.empty(0, dtype=np.float32)
+        self._active: list[dict] = []
+        self._events: list[dict] = []
+
+    def update(self, ts: np.ndarray, hz: np.ndarray) -> None:
+        ts = np.asarray(ts, dtype=np.int64)
+        hz = np.asarray(hz, dtype=np.float32)
+        keep = np.isfinite(hz)
+        if self._last_ts is not None:
+            keep &= ts > self._last_ts  # Überlappung benachbarter Abrufe
+        ts, hz = ts[keep], hz[keep]
+        self.stats["chunks"] += 1
+        if not len(ts):
+            return
+        self.stats["samples"] += len(ts)
+        self.stats["max_chunk"] = max(self.stats["max_chunk"], len(ts))
+        self._update_buckets(ts, hz)
+        self._update_events(ts, hz)
+        self._last_ts = int(ts[-1])
+
+    def finish(self) -> FrequencyOverview:
+        if self._partial is not None:
+            self._done.append(self._partial)
+            self._partial = None
+        for ev in self._active:
+            ev["open"] = False
+            self._events.append(ev)
+        self._active = []
+        return FrequencyOverview(self._bucket_frame(), *self._event_frames(), dict(self.stats))
+
+    # ----- Fenster -----
+    def _update_buckets(self, ts: np.ndarray, hz: np.ndarray) -> None:
+        dev = hz.astype(np.float64) - self.nominal_hz  # um 50 Hz zentriert: Quadratsummen bleiben genau
+        b = ts // self.bucket_s
+        starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+        agg = {
+            "bucket": b[starts],
+            "n": np.diff(np.r_[starts, len(b)]),
+            "sum": np.add.reduceat(dev, starts),
+            "sumsq": np.add.reduceat(dev * dev, starts),
+            "min": np.minimum.reduceat(dev, starts),
+            "max": np.maximum.reduceat(dev, starts),
+        }
+        p = self._partial
+        if p is not None:
+            if p["bucket"][0] == agg["bucket"][0]:
+                for k in ("n", "sum", "sumsq"):
+                    agg[k][0] += p[k][0]
+                agg["min"][0] = min(agg["min"][0], p["min"][0])
+                agg["max"][0] = max(agg["max"][0], p["max"][0])
+            else:
+                self._done.append(p)
+        if len(starts) > 1:
+            self._done.append({k: v[:-1] for k, v in agg.items()})
+        self._partial = {k: v[-1:].copy() for k, v in agg.items()}
+
+    def _bucket_frame(self) -> pd.DataFrame:
+        cols = ("bucket", "n", "sum", "sumsq", "min", "max")
+        if not self._done:
+            a = {k: np.empty(0) for k in cols}
+        else:
+            a = {k: np.concatenate([d[k] for d in self._done]) for k in cols}
+        n = a["n"].astype(np.float64)
+        mean = a["sum"] / np.maximum(n, 1)
+        std = np.sqrt(np.maximum(a["sumsq"] / np.maximum(n, 1) - mean * mean, 0.0))
+        idx = pd.Index((a["bucket"] * self.bucket_s).astype(np.int64), name="unix_seconds")
+        return pd.DataFrame({
+            "min_hz": (a["min"] + self.nominal_hz).astype(np.float32),
+            "max_hz": (a["max"] + self.nominal_hz).astype(np.float32),
+            "mean_hz": (mean + self.nominal_hz).astype(np.float32),
+            "std_hz": std.astype(np.float32),
+            "n": a["n"].astype(np.int32),
+        }, index=idx)
+
+    # ----- Ereignisse -----
+    def _runs(self, ts: np.ndarray, dev: np.ndarray) -> list[dict]:
+        """Überschreitungen dieses Blocks, mit weniger als merge_gap_s Abstand zusammengefasst."""
+        out_idx = np.flatnonzero(np.abs(dev) > self.band_hz)
+        if not len(out_idx):
+            return []
+        brk = np.flatnonzero(np.diff(ts[out_idx]) > self.merge_gap_s)
+        firsts = out_idx[np.r_[0, brk + 1]]
+        lasts = out_idx[np.r_[brk, len(out_idx) - 1]]
+        counts = np.diff(np.r_[0, brk + 1, len(out_idx)])
+        runs = []
+        for a, b, k in zip(firsts, lasts, counts):
+            seg = dev[a:b + 1]
+            runs.append({"start": int(ts[a]), "end": int(ts[b]),
+                         "extreme": float(seg[np.argmax(np.abs(seg))]), "samples_out": int(k)})
+        return runs
+
+    def _update_events(self, ts: np.ndarray, hz: np.ndarray) -> None:
+        dev = hz.astype(np.float64) - self.nominal_hz
+        runs = self._runs(ts, dev)
+        last = int(ts[-1])
+        cur = self._active[-1] if self._active and self._active[-1]["open"] else None
+
+        if cur is not None and runs and runs[0]["start"] - cur["end"] <= self.merge_gap_s:
+            run = runs.pop(0)
+            cur["end"] = run["end"]
+            cur["samples_out"] += run["samples_out"]
+            if abs(run["extreme"]) > abs(cur["extreme"]):
+                cur["extreme"] = run["extreme"]
+        if cur is not None and (runs or last - cur["end"] > self.merge_gap_s):
+            cur["open"] = False
+        for i, run in enumerate(runs):
+            is_last = i == len(runs) - 1
+            self._active.append({**run, "open": is_last and last - run["end"] <= self.merge_gap_s,
+                                 "captured": run["start"] - self.context_s - 1,
+                                 "raw_ts": [], "raw_hz": [], "raw_n": 0, "truncated": False})
+
+        # Rohwerte: Vorlauf aus dem Rest des letzten Blocks, Nachlauf ggf. aus Folgeblöcken
+        ext_ts = np.concatenate([self._tail_ts, ts])
+        ext_hz = np.concatenate([self._tail_hz, hz])
+        still = []
+        for ev in self._active:
+            limit = last if ev["open"] else min(last, ev["end"] + self.context_s)
+            lo = np.searchsorted(ext_ts, max(ev["captured"], ev["start"] - self.context_s - 1), side="right")
+            hi = np.searchsorted(ext_ts, limit, side="right")
+            room = self.max_event_samples - ev["raw_n"]
+            if hi - lo > room:
+                hi, ev["truncated"] = lo + max(room, 0), True
+            if hi > lo:
+                ev["raw_ts"].append(ext_ts[lo:hi].copy())
+                ev["raw_hz"].append(ext_hz[lo:hi].copy())
+                ev["raw_n"] += hi - lo
+            ev["captured"] = limit
+            if ev["open"] or last < ev["end"] + self.context_s:
+                still.append(ev)
+            else:
+                self._events.append(ev)
+        self._active = still
+
+        keep = ext_ts > last - self.context_s
+        self._tail_ts, self._tail_hz = ext_ts[keep], ext_hz[keep]
+
+    def _event_frames(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        evs = sorted(self._events, key=lambda e: e["start"])
+        events = pd.DataFrame({
+            "start": np.array([e["start"] for e in evs], dtype=np.int64),
+            "end": np.array([e["end"] for e in evs], dtype=np.int64),
+            "duration_s": np.array([e["end"] - e["start"] for e in evs], dtype=np.int64),
+            "direction": pd.Series(["high" if e["extreme"] > 0 else "low" for e in evs], dtype="object"),
+            "extreme_hz": np.array([e["extreme"] + self.nominal_hz for e in evs], dtype=np.float32),
+            "samples_out": np.array([e["samples_out"] for e in evs], dtype=np.int32),
+            "truncated": np.array([e["truncated"] for e in evs], dtype=bool),
+        }, index=pd.RangeIndex(len(evs), name="event"))
+        parts_ts = [np.concatenate(e["raw_ts"]) if e["raw_ts"] else np.empty(0, np.int64) for e in evs]
+        parts_hz = [np.concatenate(e["raw_hz"]) if e["raw_hz"] else np.empty(0, np.float32) for e in evs]
+        samples = pd.DataFrame({
+            "event": np.repeat(np.arange(len(evs), dtype=np.int32), [len(p) for p in parts_ts]),
+            "unix_seconds": np.concatenate(parts_ts) if parts_ts else np.empty(0, np.int64),
+            "hz": np.concatenate(parts_hz) if parts_hz else np.empty(0, np.float32),
+        })
+        return events, samples
+
+
+def ingest_frequency(
+    start: str | dt.date | dt.datetime,
+    end: str | dt.date | dt.datetime,
+    region: Regions = Regions.UCTE,
+    chunk_days: int = 1,
+    **options,
+) -> FrequencyOverview:
+    """Zeitraum [start, end) abrufen und verdichten; options wie FrequencyAggregator."""
+    agg = FrequencyAggregator(**options)
+    for ts, hz in iter_frequency_chunks(start, end, region, chunk_days):
+        agg.update(ts, hz)
+    return agg.finish()
+
+
+def write_overview(ov: FrequencyOverview, out: Path) -> list[Path]:
+    """Drei Tabellen ablegen: Parquet (zstd), ohne pyarrow CSV."""
+    out.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name, df, index in (("buckets", ov.buckets, True), ("events", ov.events, True),
+                            ("event_samples", ov.samples, False)):
+        if pyarrow is not None:
+            path = out / f"{name}.parquet"
+            df.to_parquet(path, engine="pyarrow", compression="zstd", index=index)
+        else:
+            path = out / f"{name}.csv"
+            df.to_csv(path, index=index)
+        paths.append(path)
+    return paths
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--start", type=_to_date, required=True, help="YYYY-MM-DD")
+    ap.add_argument("--end", type=_to_date, required=True, help="YYYY-MM-DD (exklusiv)")
+    ap.add_argument("--bucket", type=int, default=DEFAULT_BUCKET_S, help="Fensterbreite in s")
+    ap.add_argument("--band", type=float, default=DEFAULT_BAND_HZ, help="zulässige Abweichung von 50 Hz")
+    ap.add_argument("--context", type=int, default=DEFAULT_CONTEXT_S, help="Rohwerte vor/nach Ereignis in s")
+    ap.add_argument("--merge-gap", type=int, default=DEFAULT_MERGE_GAP_S,
+                    help="Überschreitungen mit kleinerem Abstand (s) zusammenfassen")
+    ap.add_argument("--chunk-days", type=int, default=1, help="Tage je Abruf")
+    ap.add_argument("--out", type=Path, default=None, help="Verzeichnis für buckets/events/event_samples")
+    args = ap.parse_args(argv)
+    if args.end <= args.start:
+        ap.error("--end muss nach --start liegen")
+
+    t0 = time.perf_counter()
+    ov = ingest_frequency(args.start, args.end, chunk_days=args.chunk_days, bucket_s=args.bucket,
+                          band_hz=args.band, context_s=args.context, merge_gap_s=args.merge_gap)
+    print(f"{ov.stats['samples']:,} Messwerte in {ov.stats['chunks']} Abrufen → {len(ov.buckets):,} Fenster, "
+          f"{len(ov.events)} Ereignisse ({len(ov.samples):,} Rohwerte) in {time.perf_counter() - t0:.1f} s",
+          file=sys.stderr)
+    if len(ov.buckets):
+        b = ov.buckets
+        print(f"min {b['min_hz'].min():.3f} Hz, max {b['max_hz'].max():.3f} Hz, "
+              f"Mittel {np.average(b['mean_hz'], weights=b['n']):.4f} Hz", file=sys.stderr)
+    for ev in ov.events.itertuples():
+        when = dt.datetime.fromtimestamp(ev.start, dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"  {when} UTC  {ev.duration_s:>4d} s  {ev.direction:<4}  {ev.extreme_hz:.3f} Hz", file=sys.stderr)
+    if args.out is not None:
+        for path in write_overview(ov, args.out):
+            print(f"→ {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
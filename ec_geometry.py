@@ -0,0 +1,202 @@
+# ec_geometry.py
+# -*- coding: utf-8 -*-
+"""
+Geometrie-Helfer für die Canvas-Apps (ohne Streamlit-Abhängigkeit).
+- SVG/Fabric-Pfadstrings aus NumPy-Arrays in einem Rutsch formatieren
+- Polylinien-Vereinfachung (Ramer–Douglas–Peucker) mit Pixel-Toleranz
+- Kompakte Pfade (relative Kommandos, ohne überflüssige Nullen/Leerzeichen) für den SVG-Export
+- Zeitachsen-Ticks (Tag/Woche/Monat) vektorisiert: O(n) statt Schleifen über Zeitstempel
+"""
+from __future__ import annotations
+import re
+
+import numpy as np
+import pandas as pd
+
+PATH_PRECISION = 1  # Nachkommastellen in Pfadkoordinaten (Pixel)
+SIMPLIFY_TOLERANCE_PX = 0.5  # max. Abweichung der vereinfachten Linie (Pixel); 0 = aus
+
+WD_SHORT = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
+MONTH_SHORT = ["Jan", "Feb", "Mär", "Apr", "Mai", "Jun", "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
+
+# Tick-Stufe nach Zeitraumlänge (Tage): bis 14 Tage Tages-, bis 120 Tage Wochen-, sonst Monatsticks
+TICK_LEVEL_MAX_DAYS = {"day": 14, "week": 120}
+
+
+def encode_path(xs: np.ndarray, ys: np.ndarray, precision: int = PATH_PRECISION, close: bool = False) -> str:
+    """Pfadstring 'M x0 y0 L x1 y1 ... [Z]' für eine Punktfolge.
+
+    Statt eines f-Strings pro Punkt wird ein Format-Template für alle Punkte
+    gebaut und einmal mit allen Koordinaten gefüllt (Formatierung läuft in C).
+    Ausgabe identisch zu f"{v:.{precision}f}" je Koordinate."""
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    n = int(min(len(xs), len(ys)))
+    if n == 0:
+        return ""
+    p = int(precision)
+    pair = f"%.{p}f %.{p}f"
+    template = "M " + pair + (" L " + pair) * (n - 1) + (" Z" if close else "")
+    coords = np.empty(2 * n, dtype=float)
+    coords[0::2] = xs[:n]
+    coords[1::2] = ys[:n]
+    return template % tuple(coords.tolist())
+
+
+_TRAILING_ZEROS = re.compile(r"(\.\d*?)0+(?=[ a-zA-Z]|$)")
+_BARE_POINT = re.compile(r"\.(?=[ a-zA-Z]|$)")
+_LEADING_ZERO = re.compile(r"(?<![\d.])(-?)0\.(?=\d)")
+
+
+def compact_numbers(s: str) -> str:
+    """Zahlen in einem Pfadstring kürzen: '1.50' -> '1.5', '2.0' -> '2', '0.5' -> '.5',
+    ' -3' -> '-3' (das Minus trennt bereits)."""
+    s = _TRAILING_ZEROS.sub(r"\1", s)
+    s = _BARE_POINT.sub("", s)
+    s = _LEADING_ZERO.sub(r"\1.", s)
+    return s.replace(" -", "-")
+
+
+def encode_path_relative(xs: np.ndarray, ys: np.ndarray, precision: int = PATH_PRECISION,
+                         close: bool = False, compact: bool = True) -> str:
+    """Pfadstring 'M x0 y0 l dx1 dy1 dx2 dy2 ... [z]' mit relativen Schritten.
+
+    Die Differenzen werden auf dem GERUNDETEN Raster gebildet (ganzzahlig in
+    10^-precision-Einheiten) – es summiert sich also kein Rundungsfehler auf.
+    Nullschritte (nach dem Runden doppelte Punkte) entfallen."""
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    n = int(min(len(xs), len(ys)))
+    if n == 0:
+        return ""
+    p = int(precision)
+    unit = 10.0 ** p
+    qx = np.round(xs[:n] * unit).astype(np.int64)
+    qy = np.round(ys[:n] * unit).astype(np.int64)
+    dx = np.diff(qx)
+    dy = np.diff(qy)
+    moving = (dx != 0) | (dy != 0)
+    dx, dy = dx[moving], dy[moving]
+
+    pair = f"%.{p}f %.{p}f"
+    coords = np.empty(2 * len(dx) + 2, dtype=float)
+    coords[0], coords[1] = qx[0] / unit, qy[0] / unit
+    coords[2::2] = dx / unit
+    coords[3::2] = dy / unit
+    template = "M " + pair + ((" l " + " ".join([pair] * len(dx))) if len(dx) else "") + (" z" if close else "")
+    out = template % tuple(coords.tolist())
+    if compact:
+        out = compact_numbers(out).replace("M ", "M").replace(" l ", "l").replace(" z", "z")
+    return out
+
+
+def simplify_mask(xs: np.ndarray, ys: np.ndarray, tolerance: float = SIMPLIFY_TOLERANCE_PX) -> np.ndarray:
+    """Ramer–Douglas–Peucker: bool-Maske der Punkte, die bei `tolerance` Pixeln
+    Abweichung erhalten bleiben müssen. Endpunkte bleiben immer erhalten.
+
+    Für gestapelte Flächen pro GRENZLINIE einmal berechnen und für beide
+    angrenzenden Flächen verwenden – dann teilen sich Nachbarn exakt dieselben
+    Randpunkte und der Stapel bleibt lückenlos."""
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    n = len(xs)
+    keep = np.zeros(n, dtype=bool)
+    if n <= 2 or tolerance <= 0:
+        keep[:] = True
+        return keep
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        i0, i1 = stack.pop()
+        if i1 - i0 < 2:
+            continue
+        x0, y0 = xs[i0], ys[i0]
+        dx, dy = xs[i1] - x0, ys[i1] - y0
+        sx = xs[i0 + 1:i1] - x0
+        sy = ys[i0 + 1:i1] - y0
+        norm = float(np.hypot(dx, dy))
+        if norm == 0.0:
+            d = np.hypot(sx, sy)
+        else:
+            d = np.abs(dy * sx - dx * sy) / norm
+        k = int(np.argmax(d))
+        if d[k] > tolerance:
+            idx = i0 + 1 + k
+            keep[idx] = True
+            stack.append((i0, idx))
+            stack.append((idx, i1))
+    return keep
+
+
+def nearest_indices(values: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Index des jeweils nächstgelegenen Werts in der SORTIERTEN Folge `values`
+    (per searchsorted). Bei Gleichstand gewinnt der kleinere Index – wie argmin."""
+    values = np.asarray(values)
+    targets = np.asarray(targets)
+    n = len(values)
+    if n == 0:
+        return np.zeros(len(targets), dtype=np.int64)
+    right = np.searchsorted(values, targets, side="left").clip(0, n - 1)
+    left = (right - 1).clip(0, n - 1)
+    pick_left = np.abs(targets - values[left]) <= np.abs(values[right] - targets)
+    return np.where(pick_left, left, right).astype(np.int64)
+
+
+def choose_tick_level(span: pd.Timedelta) -> str:
+    days = span / pd.Timedelta(days=1)
+    for level, max_days in TICK_LEVEL_MAX_DAYS.items():
+        if days <= max_days:
+            return level
+    return "month"
+
+
+def _period_starts(days: np.ndarray, level: str) -> np.ndarray:
+    # days: datetime64[D]; liefert den Beginn der Tag-/Wochen-/Monatsperiode je Zeitstempel
+    if level == "day":
+        return days
+    if level == "week":
+        # 1970-01-01 war ein Donnerstag -> Montag = Tag - ((Tage seit Epoche + 3) % 7)
+        return days - ((days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+    if level == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    raise ValueError(f"Unbekannte Tick-Stufe: {level}")
+
+
+def time_axis_ticks(timestamps, level: str | None = None) -> tuple[str, np.ndarray, np.ndarray, list[str]]:
+    """Ticks für eine Zeitachse, vollständig vektorisiert.
+
+    Rückgabe (level, boundary_idx, label_idx, labels):
+      - boundary_idx: Indizes, an denen eine neue Periode beginnt (inkl. 0)
+      - label_idx:    je Periode der Index, der der Periodenmitte am nächsten liegt
+                      (Tag: 12:00 Uhr, Woche: Donnerstag 12:00, Monat: Monatsmitte)
+      - labels:       Wochentag ('Mo'), Kalenderwoche ('KW 12') oder Monat ('Mär')
+    """
+    ts = pd.to_datetime(pd.Series(timestamps)).to_numpy(dtype="datetime64[ns]")
+    if len(ts) == 0:
+        return level or "day", np.array([0]), np.array([], dtype=np.int64), []
+    if level is None:
+        level = choose_tick_level(pd.Timedelta(ts[-1] - ts[0]))
+
+    starts = _period_starts(ts.astype("datetime64[D]"), level)
+    boundary_idx = np.concatenate([[0], np.flatnonzero(starts[1:] != starts[:-1]) + 1])
+
+    periods = starts[boundary_idx]
+    if level == "day":
+        mids = periods.astype("datetime64[ns]") + np.timedelta64(12, "h")
+    elif level == "week":
+        mids = periods.astype("datetime64[ns]") + np.timedelta64(3 * 24 + 12, "h")
+    else:
+        next_m = (periods.astype("datetime64[M]") + 1).astype("datetime64[ns]")
+        mids = periods.astype("datetime64[ns]") + (next_m - periods.astype("datetime64[ns]")) // 2
+    label_idx = nearest_indices(ts.view(np.int64), mids.view(np.int64))
+
+    if level == "day":
+        # Wochentag des tatsächlich getroffenen Zeitstempels
+        wd = ((ts[label_idx].astype("datetime64[D]").astype(np.int64) + 3) % 7).tolist()
+        labels = [WD_SHORT[w] for w in wd]
+    elif level == "week":
+        labels = [f"KW {d.isocalendar()[1]}" for d in pd.DatetimeIndex(periods)]
+    else:
+        labels = [MONTH_SHORT[m - 1] for m in pd.DatetimeIndex(periods).month]
+    return level, boundary_idx, label_idx, labels
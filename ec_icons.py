@@ -0,0 +1,75 @@
+# ec_icons.py
+# -*- coding: utf-8 -*-
+"""
+Icon-Assets für die Canvas-Apps.
+- Jedes Icon wird pro Prozess EINMAL gelesen und auf Anzeigegröße verkleinert
+- Ergebnis: kleine, stabile Data-URL + Content-Hash (z. B. für ETags / SVG-<defs>)
+- Pillow ist optional; ohne Pillow wird das Original-PNG verwendet (Fabric skaliert dann)
+"""
+from __future__ import annotations
+import base64
+import functools
+import hashlib
+import io
+from pathlib import Path
+from typing import NamedTuple
+
+try:
+    from PIL import Image  # type: ignore
+except Exception:  # Pillow nicht installiert
+    Image = None
+
+BASE_DIR = Path(__file__).resolve().parent
+ICON_DIR = BASE_DIR / "icons"
+
+# Faktor über Anzeigegröße, damit Icons auf HiDPI-Displays scharf bleiben
+ICON_OVERSAMPLE = 2
+
+
+class IconAsset(NamedTuple):
+    data_url: str
+    width: int    # tatsächliche Pixelbreite der eingebetteten Grafik
+    height: int
+    sha: str      # Content-Hash (sha256, gekürzt) der eingebetteten Bytes
+
+
+def _resolve(path: str | Path) -> Path:
+    p = Path(path)
+    if p.is_absolute() or p.exists():
+        return p
+    return BASE_DIR / p
+
+
+@functools.lru_cache(maxsize=64)
+def _load_icon(path: str, size_px: int | None, mtime_ns: int) -> IconAsset:
+    raw = Path(path).read_bytes()
+    width = height = None
+    if Image is not None:
+        with Image.open(io.BytesIO(raw)) as img:
+            width, height = img.size
+            if size_px:
+                target = int(size_px) * ICON_OVERSAMPLE
+                if max(width, height) > target:
+                    img = img.convert("RGBA")
+                    img.thumbnail((target, target), Image.LANCZOS)
+                    buf = io.BytesIO()
+                    img.save(buf, format="PNG", optimize=True)
+                    raw = buf.getvalue()
+                    width, height = img.size
+    if width is None:
+        # Ohne Pillow: Größe aus dem PNG-IHDR-Chunk lesen
+        width = int.from_bytes(raw[16:20], "big")
+        height = int.from_bytes(raw[20:24], "big")
+    sha = hashlib.sha256(raw).hexdigest()[:16]
+    data_url = "data:image/png;base64," + base64.b64encode(raw).decode("ascii")
+    return IconAsset(data_url, int(width), int(height), sha)
+
+
+def icon_asset(path: str | Path, size_px: int | None = None) -> IconAsset | None:
+    """Gecachtes Icon (auf size_px × ICON_OVERSAMPLE verkleinert) oder None, falls die Datei fehlt.
+    Relative Pfade werden zum Projektverzeichnis aufgelöst (unabhängig vom Arbeitsverzeichnis)."""
+    p = _resolve(path)
+    if not p.exists():
+        return None
+    # mtime im Schlüssel: ausgetauschte Icons werden ohne Neustart übernommen
+    return _load_icon(str(p.resolve()), size_px, p.stat().st_mtime_ns)
@@ -0,0 +1,284 @@
+# ec_pipeline.py
+# -*- coding: utf-8 -*-
+"""
+Lazy Pipeline mit Zwischenergebnis-Cache: fetch → parse → transform → derive → render.
+- Jede Stufe ist eine reine Funktion mit deklarierten Eingängen (andere Stufen) und Parametern
+- Schlüssel inhaltsadressiert: Quelle (Upstream-Antwort) nach Hash ihres Inhalts, jede weitere Stufe
+  nach Stufenname + Version + eigenen Parametern + Schlüsseln der Eingänge (Merkle-Prinzip)
+- Lazy: get("aggregated") rechnet nur raw → parsed → aggregated, erzeugerCombined bleibt ungebaut
+- Nur Render-Optionen geändert (z. B. axes/symbols) → gleiche Schlüssel für fetch/transform → Treffer
+- Zwischenstand im Speicher (TTLCache, Single-Flight), auf Platte nur mit gesetztem EC_PIPELINE_DIR
+  (ohne = nur Speicher); unlesbare Dateien (z. B. nach pandas-Update) gelten als Fehltreffer und werden
+  gelöscht. Die Zuordnung Anfrage → Inhalt der Quelle lebt so lange wie
+  ec_cache.ttl_for_range es für den Zeitraum vorsieht; alles Weitere ist unveränderlich
+- Auf Platte landen nur archivierte Zeiträume (ttl_for_range = TTL_ARCHIVE_S, Inhalt ändert sich nicht
+  mehr); jüngere Zeiträume bleiben im Speicher, sonst wüchse das Verzeichnis mit jeder Nachlieferung
+
+Beispiel:
+    PIPELINE.get("aggregated", start="2024-01-01", end="2024-01-08")
+    PIPELINE.get("svg", start="2024-01-01", end="2024-01-08", axes=True, symbols=True)
+"""
+from __future__ import annotations
+import datetime as dt
+import hashlib
+import json
+import os
+import pickle
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+import pandas as pd
+
+from ec_cache import TTL_ARCHIVE_S, TTLCache, ttl_for_range
+from ec_fetch import Countries, _to_date, fetch_public_power_raw, parse_public_power
+from ec_profile import stage
+from ec_scene import DEFAULT_GEOMETRY, Scene, build_scene, iter_scene_svg
+from ec_transform import (
+    aggregated_frame, ausgleich_frame, choose_resample_rule, combined_frame, erzeuger_frame, resample_mean,
+)
+
+# Bei inhaltlichen Änderungen an einer Stufe erhöhen – alte Einträge auf Platte werden dann ignoriert
+PIPELINE_VERSION = 1
+MEMORY_ENTRIES = 256
+DEFAULTS = {
+    "country": Countries.GERMANY,
+    "width": DEFAULT_GEOMETRY.width,
+    "height": DEFAULT_GEOMETRY.height,
+    "consumption": True,
+    "axes": False,
+    "symbols": False,
+}
+
+
+class Stage(NamedTuple):
+    fn: Callable[..., Any]
+    inputs: tuple[str, ...] = ()
+    params: tuple[str, ...] = ()
+    disk: bool = True
+    source: bool = False  # Upstream: Schlüssel erst nach dem Abruf (Inhalts-Hash) bekannt
+
+
+# ---------------------------
+# Stufen (reine Funktionen)
+# ---------------------------
+def _geometry(width: int, height: int):
+    return DEFAULT_GEOMETRY._replace(width=width, height=height)
+
+
+def _lod(frame: pd.DataFrame, *, start: dt.date, end: dt.date, width: int) -> pd.DataFrame:
+    """Auf Plotbreite vergröbern (wie ec_render.poster_scene)."""
+    rule = choose_resample_rule(pd.Timedelta(days=(end - start).days),
+                                _geometry(width, DEFAULT_GEOMETRY.height).plot_width)
+    return resample_mean(frame, rule)
+
+
+def _scene(dfc: pd.DataFrame, dfagg: pd.DataFrame, *, consumption: bool, axes: bool, symbols: bool,
+           width: int, height: int) -> Scene:
+    return build_scene(dfc, dfagg, show_consumption=consumption, show_axes=axes, show_symbols=symbols,
+                       g=_geometry(width, height))
+
+
+def _svg(scene: Scene) -> str:
+    return "".join(iter_scene_svg(scene))
+
+
+STAGES: dict[str, Stage] = {
+    # fetch
+    "raw": Stage(fetch_public_power_raw, params=("start", "end", "country"), source=True),
+    # parse
+    "parsed": Stage(parse_public_power, ("raw",), ("start", "end")),
+    # transform
+    "erzeuger": Stage(erzeuger_frame, ("parsed",)),
+    "combined": Stage(combined_frame, ("erzeuger",)),
+    "ausgleich": Stage(ausgleich_frame, ("parsed",)),
+    "aggregated": Stage(aggregated_frame, ("parsed",)),
+    # derive
+    "combined_lod": Stage(_lod, ("combined",), ("start", "end", "width"), disk=False),
+    "aggregated_lod": Stage(_lod, ("aggregated",), ("start", "end", "width"), disk=False),
+    # render
+    "scene": Stage(_scene, ("combined_lod", "aggregated_lod"),
+                   ("consumption", "axes", "symbols", "width", "height"), disk=False),
+    "svg": Stage(_svg, ("scene",)),
+}
+
+
+def _key_part(value: Any) -> str:
+    if isinstance(value, Countries):
+        return value.value
+    if isinstance(value, (dt.date, dt.datetime)):
+        return value.isoformat()
+    return repr(value)
+
+
+def _digest(*parts: Any) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        h.update(_key_part(p).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def _content_digest(value: Any) -> str:
+    return hashlib.blake2b(json.dumps(value, separators=(",", ":")).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Pipeline:
+    """Lazy ausgewertete Stufen mit inhaltsadressiertem Speicher- und Platten-Cache."""
+
+    def __init__(self, disk_dir: str | Path | None = None, memory: TTLCache | None = None,
+                 stages: dict[str, Stage] = STAGES):
+        self.stages = stages
+        self.memory = memory if memory is not None else TTLCache(max_entries=MEMORY_ENTRIES)
+        self.sources = TTLCache(max_entries=MEMORY_ENTRIES)  # Anfrage-Schlüssel -> Inhalts-Schlüssel
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.computed: Counter = Counter()  # tatsächlich ausgeführte Stufen (für Tests/Diagnose)
+
+    # ----- öffentliche API -----
+    def get(self, name: str, **options) -> Any:
+        """Wert der Stufe `name`; rechnet nur fehlende Vorgänger. Ergebnisse nicht verändern (geteilt)."""
+        return self._get(name, self._options(options))
+
+    def key(self, name: str, **options) -> str:
+        """Inhaltsadressierter Schlüssel (löst ggf. den Upstream-Abruf aus)."""
+        return self._key(name, self._options(options))
+
+    def frames(self, start, end, country=Countries.GERMANY) -> tuple[pd.DataFrame, ...]:
+        """Wie transform_df: (erzeuger, erzeugerCombined, ausgleich, aggregated)."""
+        opts = self._options({"start": start, "end": end, "country": country})
+        return tuple(self._get(n, opts) for n in ("erzeuger", "combined", "ausgleich", "aggregated"))
+
+    # ----- intern -----
+    def _options(self, options: dict) -> dict:
+        opts = {**DEFAULTS, **options}
+        opts["start"], opts["end"] = _to_date(opts["start"]), _to_date(opts["end"])
+        if opts["end"] <= opts["start"]:
+            raise ValueError("end muss nach start liegen (exklusiv).")
+        if not isinstance(opts["country"], Countries):
+            opts["country"] = Countries(str(opts["country"]).lower())
+        return opts
+
+    def _key(self, name: str, opts: dict) -> str:
+        st = self.stages[name]
+        if st.source:
+            return self._source_key(name, opts)
+        return _digest(name, PIPELINE_VERSION, *(f"{p}={_key_part(opts[p])}" for p in st.params),
+                       *(self._key(i, opts) for i in st.inputs))
+
+    def _get(self, name: str, opts: dict) -> Any:
+        st = self.stages[name]
+        while True:
+            key = self._key(name, opts)
+            found, value = self.memory.peek(key)
+            if found:
+                return value
+            if st.source:
+                value = self._disk_get(name, key)
+                if value is None:
+                    # Inhalt verdrängt und nicht auf Platte: Zuordnung verwerfen, neu abrufen
+                    self.sources.invalidate(self._request_key(name, opts))
+                    continue
+                self.memory.put(key, value, ttl=TTL_ARCHIVE_S)
+                return value
+            return self.memory.get_or_load(key, lambda: self._load(name, key, opts), ttl=TTL_ARCHIVE_S)
+
+    def _load(self, name: str, key: str, opts: dict) -> Any:
+        st = self.stages[name]
+        disk = st.disk and self._persist(opts)
+        if disk:
+            value = self._disk_get(name, key)
+            if value is not None:
+                return value
+        inputs = [self._get(i, opts) for i in st.inputs]
+        value = self._compute(name, inputs, opts)
+        if disk:
+            self._disk_put(name, key, value)
+        return value
+
+    def _compute(self, name: str, inputs: list, opts: dict) -> Any:
+        st = self.stages[name]
+        with stage("pipeline", node=name):
+            value = st.fn(*inputs, **{p: opts[p] for p in st.params})
+        self.computed[name] += 1
+        return value
+
+    def _request_key(self, name: str, opts: dict) -> str:
+        return _digest("request", name, PIPELINE_VERSION, *(opts[p] for p in self.stages[name].params))
+
+    def _source_key(self, name: str, opts: dict) -> str:
+        rk = self._request_key(name, opts)
+        ttl = ttl_for_range(opts["end"])
+
+        disk = self._persist(opts)
+
+        def _resolve() -> str:
+            ck = self._disk_source(rk, name) if disk else None
+            if ck is not None:
+                return ck
+            value = self._compute(name, [], opts)
+            ck = _digest(name, _content_digest(value))
+            self.memory.put(ck, value, ttl=TTL_ARCHIVE_S)
+            if disk:
+                self._disk_put(name, ck, value)
+                self._disk_put_source(rk, ck, ttl)
+            return ck
+
+        return self.sources.get_or_load(rk, _resolve, ttl=ttl)
+
+    # ----- Platte -----
+    def _persist(self, opts: dict) -> bool:
+        """Nur abgeschlossene Zeiträume auf Platte – deren Inhalt und damit Schlüssel bleiben stabil."""
+        return self.disk_dir is not None and ttl_for_range(opts["end"]) >= TTL_ARCHIVE_S
+
+    def _disk_path(self, name: str, key: str) -> Path:
+        return self.disk_dir / name / f"{key}.pkl"
+
+    def _disk_get(self, name: str, key: str) -> Any:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(name, key)
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Abgebrochen geschrieben oder mit anderer pandas/numpy-Version gepickelt → neu rechnen
+            path.unlink(missing_ok=True)
+            return None
+
+    def _disk_put(self, name: str, key: str, value: Any) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(name, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def _disk_source(self, rk: str, name: str = "raw") -> str | None:
+        """Inhalts-Schlüssel einer früheren Anfrage, solange deren TTL läuft und der Inhalt noch da ist."""
+        if self.disk_dir is None:
+            return None
+        try:
+            entry = json.loads((self.disk_dir / "_sources" / f"{rk}.json").read_text("utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or "key" not in entry or "expires" not in entry:
+            return None
+        if entry["expires"] <= time.time() or not self._disk_path(name, entry["key"]).exists():
+            return None
+        return entry["key"]
+
+    def _disk_put_source(self, rk: str, ck: str, ttl: float) -> None:
+        if self.disk_dir is None:
+            return
+        path = self.disk_dir / "_sources" / f"{rk}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"key": ck, "expires": time.time() + ttl}), encoding="utf-8")
+
+
+# Eine Pipeline pro Prozess – von allen Sessions/Requests geteilt
+PIPELINE = Pipeline(disk_dir=os.environ.get("EC_PIPELINE_DIR") or None)
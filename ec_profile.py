@@ -0,0 +1,165 @@
+# ec_profile.py
+# -*- coding: utf-8 -*-
+"""
+Opt-in-Profiling der Pipeline-Stufen (fetch, parse, transform, scene, serialize).
+- Einschalten per Umgebungsvariable, ohne Code zu ändern:
+      EC_PROFILE=timing               Laufzeit je Stufe als JSON-Zeile (timing.jsonl)
+      EC_PROFILE=cprofile             zusätzlich cProfile-Dump je Aufruf (*.prof, z. B. snakeviz)
+      EC_PROFILE=tracemalloc          zusätzlich Speicher-Spitze + Snapshot je Aufruf (*.tracemalloc)
+      EC_PROFILE=cprofile,tracemalloc Kombinationen möglich; timing ist immer dabei
+  Ablage: EC_PROFILE_DIR (Standard: ./profiles)
+- Ausgeschaltet kostet @profiled nichts (gibt die Funktion unverändert zurück)
+- Jede Stufe ist zugleich ein Span für ec_trace (EC_TRACE=1), unabhängig von EC_PROFILE
+- Verschachtelte Stufen (parse in fetch): cProfile/Snapshot nur für die äußerste Stufe je Thread,
+  Zeiten für alle; cProfile höchstens in einem Thread gleichzeitig (sonst nur timing)
+
+Auswerten:
+    python -m pstats profiles/fetch-20250101T120000-1234-1.prof
+    python -c "import tracemalloc; s = tracemalloc.Snapshot.load('profiles/….tracemalloc'); \\
+               [print(x) for x in s.statistics('lineno')[:15]]"
+"""
+from __future__ import annotations
+import contextlib
+import cProfile
+import datetime as dt
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Iterator, TypeVar
+
+from ec_trace import TRACE_ENABLED, current_trace_id, span
+
+MODES = ("timing", "cprofile", "tracemalloc")
+F = TypeVar("F", bound=Callable)
+
+
+def _parse_modes(value: str) -> frozenset[str]:
+    modes = {m.strip().lower() for m in value.split(",") if m.strip()}
+    unknown = modes - set(MODES)
+    if unknown:
+        raise ValueError(f"EC_PROFILE: unbekannte Modi {sorted(unknown)}, erlaubt: {', '.join(MODES)}")
+    return frozenset(modes | {"timing"}) if modes else frozenset()
+
+
+PROFILE_MODES = _parse_modes(os.environ.get("EC_PROFILE", ""))
+PROFILE_DIR = Path(os.environ.get("EC_PROFILE_DIR", "profiles"))
+ENABLED = bool(PROFILE_MODES)
+
+_local = threading.local()
+_seq = itertools.count(1)
+_write_lock = threading.Lock()
+_cprofile_lock = threading.Lock()  # cProfile: nur ein aktiver Profiler je Prozess (ab Python 3.12 Pflicht)
+
+
+def _dump_name(stage_name: str, seq: int, suffix: str) -> Path:
+    stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return PROFILE_DIR / f"{stage_name}-{stamp}-{os.getpid()}-{seq}{suffix}"
+
+
+def _write_timing(record: dict) -> None:
+    line = json.dumps(record, default=str) + "\n"
+    with _write_lock:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(PROFILE_DIR / "timing.jsonl", "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+@contextlib.contextmanager
+def stage(name: str, **info) -> Iterator[dict]:
+    """Misst einen Pipeline-Abschnitt. info (z. B. start/end) landet mit in timing.jsonl und im Span;
+    das gelieferte dict kann im Block ergänzt werden (z. B. info["status"] = 200)."""
+    if not TRACE_ENABLED:
+        with _profile(name, info):
+            yield info
+        return
+    with span(name, **info) as attrs, _profile(name, attrs):
+        yield attrs
+
+
+@contextlib.contextmanager
+def _profile(name: str, info: dict) -> Iterator[None]:
+    if not ENABLED:
+        yield
+        return
+
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+    seq = next(_seq)
+    outer = depth == 0
+
+    prof = None
+    if outer and "cprofile" in PROFILE_MODES and _cprofile_lock.acquire(blocking=False):
+        prof = cProfile.Profile()
+    snap_mem = outer and "tracemalloc" in PROFILE_MODES
+    if snap_mem:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        mem_before = tracemalloc.get_traced_memory()[0]
+
+    t0 = time.perf_counter()
+    error = None
+    try:
+        if prof is not None:
+            prof.enable()
+        yield
+    except BaseException as ex:
+        error = type(ex).__name__
+        raise
+    finally:
+        if prof is not None:
+            prof.disable()
+        seconds = time.perf_counter() - t0
+        _local.depth = depth
+        record = {
+            "ts": dt.datetime.now(dt.timezone.utc).isoformat(timespec="milliseconds"),
+            "stage": name,
+            "seconds": round(seconds, 6),
+            "depth": depth,
+            "seq": seq,
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            "trace_id": current_trace_id(),
+            **info,
+        }
+        if error:
+            record["error"] = error
+        try:
+            if prof is not None:
+                path = _dump_name(name, seq, ".prof")
+                path.parent.mkdir(parents=True, exist_ok=True)
+                prof.dump_stats(path)
+                record["cprofile"] = path.name
+            if snap_mem:
+                current, peak = tracemalloc.get_traced_memory()
+                record["mem_peak_bytes"] = peak - mem_before
+                record["mem_retained_bytes"] = current - mem_before
+                path = _dump_name(name, seq, ".tracemalloc")
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tracemalloc.take_snapshot().dump(str(path))
+                record["snapshot"] = path.name
+            _write_timing(record)
+        finally:
+            if prof is not None:
+                _cprofile_lock.release()
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """Dekorator: ganze Funktion als Stufe `name`. Ohne EC_PROFILE/EC_TRACE unverändert."""
+    def deco(fn: F) -> F:
+        if not (ENABLED or TRACE_ENABLED):
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name, func=fn.__qualname__):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return deco
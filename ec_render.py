@@ -0,0 +1,184 @@
+# ec_render.py
+# -*- coding: utf-8 -*-
+"""
+Batch-Renderer: Energy-Charts-Postkarten als SVG-Dateien, ohne Streamlit.
+- Gleiche Szene wie canvas_energy_shapes_withSymbols.py (Bausteine aus ec_scene)
+- Zeiträume per --range START:END (mehrfach) oder --weeks JAHR (alle ISO-Wochen)
+- Daten je Land EINMAL für die zusammenhängende Spanne laden, dann je Zeitraum schneiden
+- Rendern parallel in Worker-Prozessen (ProcessPoolExecutor)
+- Fehlt eine Spanne (404/422, leere Antwort, Netzfehler), werden nur deren Zeiträume übersprungen;
+  der Exit-Code ist dann 1
+
+Aufruf:
+    python ec_render.py --weeks 2024 --country de --out posters/
+    python ec_render.py --range 2024-03-04:2024-03-11 --axes --symbols
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import requests
+
+from ec_cache import load_power_frames
+from ec_fetch import Countries, _to_date
+from ec_scene import DEFAULT_GEOMETRY, Geometry, Scene, build_scene, iter_scene_svg, write_svg
+from ec_transform import choose_resample_rule, resample_mean
+
+try:
+    from app.api import APIRequestError, ValidationError  # type: ignore
+except Exception:
+    class APIRequestError(Exception):
+        status_code = None
+
+    class ValidationError(Exception):
+        pass
+
+
+def parse_range(text: str) -> tuple[dt.date, dt.date]:
+    """'YYYY-MM-DD:YYYY-MM-DD' -> (start, end), Ende exklusiv."""
+    try:
+        a, b = text.split(":", 1)
+        s, e = _to_date(a), _to_date(b)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ungültiger Zeitraum '{text}' (erwartet START:END)")
+    if e <= s:
+        raise argparse.ArgumentTypeError(f"Ungültiger Zeitraum '{text}': end muss nach start liegen (exklusiv).")
+    return s, e
+
+
+def iso_weeks(year: int) -> list[tuple[dt.date, dt.date]]:
+    """Alle ISO-Wochen (Mo–Mo) eines Jahres."""
+    weeks = []
+    monday = dt.date.fromisocalendar(year, 1, 1)
+    while monday.isocalendar()[0] == year:
+        weeks.append((monday, monday + dt.timedelta(days=7)))
+        monday += dt.timedelta(days=7)
+    return weeks
+
+
+def merge_ranges(ranges: list[tuple[dt.date, dt.date]]) -> list[tuple[dt.date, dt.date]]:
+    """Überlappende/aneinandergrenzende Zeiträume zu Spannen zusammenfassen (ein Abruf je Spanne)."""
+    merged: list[list[dt.date]] = []
+    for s, e in sorted(ranges):
+        if merged and s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+    return [(s, e) for s, e in merged]
+
+
+def _slice(df: pd.DataFrame, s: dt.date, e: dt.date) -> pd.DataFrame:
+    ts = df["timestamp"]
+    return df.loc[(ts >= pd.Timestamp(s)) & (ts < pd.Timestamp(e))].reset_index(drop=True)
+
+
+def poster_scene(dfc: pd.DataFrame, dfagg: pd.DataFrame | None, days: int, *, consumption: bool = True,
+                 axes: bool = False, symbols: bool = False, g: Geometry = DEFAULT_GEOMETRY) -> Scene:
+    """Szene wie in der Canvas-App: erst auf Plotbreite vergröbern (Mittelwert je Bucket), dann bauen."""
+    rule = choose_resample_rule(pd.Timedelta(days=days), g.plot_width)
+    dfc = resample_mean(dfc, rule)
+    dfagg = resample_mean(dfagg, rule) if dfagg is not None else None
+    return build_scene(dfc, dfagg, show_consumption=consumption, show_axes=axes, show_symbols=symbols, g=g)
+
+
+def render_one(job: dict) -> tuple[str, int]:
+    """Worker: Szene bauen, als SVG (gestreamt) schreiben. Rückgabe (Pfad, Bytes)."""
+    scene = poster_scene(
+        job["dfc"], job["dfagg"], (job["end"] - job["start"]).days,
+        consumption=job["consumption"],
+        axes=job["axes"],
+        symbols=job["symbols"],
+    )
+    path = Path(job["out"])
+    size = write_svg(iter_scene_svg(scene), path)
+    return str(path), size
+
+
+def build_jobs(ranges, countries, out_dir: Path, *, consumption=True, axes=False,
+               symbols=False) -> tuple[list[dict], int]:
+    """Render-Jobs je Land × Zeitraum. Rückgabe (jobs, Anzahl nicht ladbarer Spannen)."""
+    jobs = []
+    failed = 0
+    for country in countries:
+        for span_s, span_e in merge_ranges(ranges):
+            try:
+                _, dfc_all, _, dfagg_all = load_power_frames(span_s, span_e, country=country)
+            except (ValidationError, APIRequestError, RuntimeError, requests.RequestException) as ex:
+                print(f"Fehler beim Laden: {country.value} {span_s}–{span_e}: {ex}", file=sys.stderr)
+                failed += 1
+                continue
+            for s, e in ranges:
+                if not (span_s <= s and e <= span_e):
+                    continue
+                dfc = _slice(dfc_all, s, e)
+                if dfc.empty:
+                    print(f"Keine Daten: {country.value} {s}–{e}", file=sys.stderr)
+                    continue
+                jobs.append({
+                    "start": s,
+                    "end": e,
+                    "dfc": dfc,
+                    "dfagg": _slice(dfagg_all, s, e),
+                    "consumption": consumption,
+                    "axes": axes,
+                    "symbols": symbols,
+                    "out": out_dir / f"{country.value}_{s.isoformat()}_{e.isoformat()}.svg",
+                })
+    return jobs, failed
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--range", dest="ranges", type=parse_range, action="append", default=[],
+                    help="Zeitraum START:END (YYYY-MM-DD, Ende exklusiv); mehrfach möglich")
+    ap.add_argument("--weeks", type=int, action="append", default=[], metavar="JAHR",
+                    help="alle ISO-Wochen eines Jahres rendern; mehrfach möglich")
+    ap.add_argument("--country", action="append", default=[],
+                    help="Ländercode (z. B. de, fr); mehrfach möglich, Standard: de")
+    ap.add_argument("--out", type=Path, default=Path("posters"))
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--no-consumption", action="store_true", help="Stromverbrauch ausblenden")
+    ap.add_argument("--axes", action="store_true", help="Achsen einblenden")
+    ap.add_argument("--symbols", action="store_true", help="Symbole einblenden")
+    args = ap.parse_args(argv)
+
+    ranges = list(args.ranges)
+    for year in args.weeks:
+        ranges += iso_weeks(year)
+    if not ranges:
+        ap.error("mindestens ein --range oder --weeks angeben")
+    try:
+        countries = [Countries(c.lower()) for c in (args.country or ["de"])]
+    except ValueError as ex:
+        ap.error(f"Unbekanntes Land: {ex}")
+    args.out.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    jobs, failed = build_jobs(ranges, countries, args.out, consumption=not args.no_consumption,
+                      axes=args.axes, symbols=args.symbols)
+    t_fetch = time.perf_counter() - t0
+
+    if args.workers <= 1 or len(jobs) <= 1:
+        results = [render_one(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(render_one, jobs, chunksize=max(1, len(jobs) // (4 * args.workers))))
+    total = 0
+    for path, size in results:
+        total += size
+        print(f"{path} ({size / 1024:.0f} KiB)")
+
+    t_all = time.perf_counter() - t0
+    print(f"{len(jobs)} Dateien, {total / 1024 / 1024:.1f} MiB – Laden {t_fetch:.1f} s, gesamt {t_all:.1f} s",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,810 @@
+# ec_scene.py
+# -*- coding: utf-8 -*-
+"""
+Streamlit-freie Szene-Bausteine der Canvas-Apps (Fabric-JSON + SVG-Export).
+- Gestapelte Flächen, Stromverbrauch, Nullinie als Layer: kompakte (n, 2)-Vertex-Arrays
+- Minimale Achsen (Tag/Woche/Monat), feste Symbole
+- Serializer: Fabric-JSON (objektlokal normalisiert), SVG (streamend, kompakte Pfade,
+  Icons per <defs>/<use>) und reine Arrays
+Genutzt von beiden Canvas-Apps und dem Batch-Renderer ec_render.py.
+"""
+from __future__ import annotations
+import hashlib
+import io
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from ec_geometry import (
+    PATH_PRECISION, SIMPLIFY_TOLERANCE_PX, compact_numbers, encode_path, encode_path_relative,
+    simplify_mask, time_axis_ticks,
+)
+from ec_icons import icon_asset
+from ec_profile import profiled
+
+FABRIC_VERSION = "5.2.4"
+
+# Farben (unten → oben gedacht)
+COLOR = {
+    "Biomasse": "#2ca02cCC",
+    "Photovoltaik": "#ffd700CC",
+    "Wasserkraft": "#003366CC",
+    "Wind": "#87ceebCC",
+    "Kohle und Öl": "#8b4513CC",
+    "Gas": "#d2b48cCC",
+    "Andere": "#7f7f7fCC",
+}
+DEFAULT_ORDER = [
+    "Andere",
+    "Wasserkraft",
+    "Biomasse",
+    "Wind",
+    "Photovoltaik",
+    "Kohle und Öl",
+    "Gas",
+]
+
+# Feste Symbole (Name, Pfad relativ zum Projekt) und ihre Anzeigegröße
+ICONS = [
+    ("wind", "icons/icon_wind.png"),
+    ("solar", "icons/icon_solar.png"),
+    ("wasserkraft", "icons/icon_wasserkraft.png"),
+]
+ICON_PX = 72
+
+
+class Geometry(NamedTuple):
+    """Canvas-Geometrie; Reihenfolge wie GEOMETRY in den Canvas-Apps."""
+    width: int = 1200
+    height: int = 600
+    pad_top: int = 20
+    pad_bottom: int = 40
+    pad_left: int = 40
+    pad_right: int = 20
+
+    @property
+    def plot_width(self) -> int:
+        return self.width - self.pad_left - self.pad_right
+
+    @property
+    def usable_height(self) -> int:
+        return self.height - self.pad_top - self.pad_bottom
+
+
+DEFAULT_GEOMETRY = Geometry()
+
+# Gemeinsame Eigenschaften fixer (nicht verschiebbarer) Linienobjekte
+_LOCKED_LINE = {
+    'fill': '',
+    'strokeUniform': True,
+    'selectable': False,
+    'evented': False,
+    'hasControls': False,
+    'hasBorders': False,
+    'lockMovementX': True,
+    'lockMovementY': True,
+    'lockScalingX': True,
+    'lockScalingY': True,
+    'lockRotation': True,
+    'hoverCursor': 'default',
+}
+
+
+def safe_numeric(s: pd.Series) -> np.ndarray:
+    return pd.to_numeric(s, errors="coerce").fillna(0.0).to_numpy()
+
+
+def x_positions(n: int, g: Geometry = DEFAULT_GEOMETRY) -> np.ndarray:
+    return np.linspace(g.pad_left, g.width - g.pad_right, n)
+
+
+def y_px(values: np.ndarray, y_scale: float, g: Geometry = DEFAULT_GEOMETRY) -> np.ndarray:
+    return g.height - g.pad_bottom - values * y_scale
+
+
+# ---------------------------
+# Layer: Fläche/Linie als Vertex-Array
+# ---------------------------
+class Layer(NamedTuple):
+    """Eine Szene-Ebene als kompaktes (n, 2)-Array absoluter Canvas-Koordinaten
+    (bereits vereinfacht). Flächen sind geschlossen und verschiebbar, Linien fix."""
+    name: str
+    xy: np.ndarray
+    closed: bool = True
+    fill: str = ""
+    stroke: str = "#333333"
+    stroke_width: float = 1
+    opacity: float = 0.9
+    movable: bool = True
+
+
+def _xy(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    return np.column_stack([np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)])
+
+
+# ---------------------------
+# Skalierung + Flächen
+# ---------------------------
+def compute_scale(dfc: pd.DataFrame, stack_order, dfagg: pd.DataFrame | None, show_consumption: bool,
+                  g: Geometry = DEFAULT_GEOMETRY) -> tuple[float, float]:
+    """(y_max, y_scale): Maximum des Stapels (und ggf. des Stromverbrauchs) auf die nutzbare Höhe."""
+    n = len(dfc)
+    vals = np.column_stack([safe_numeric(dfc[s]) for s in stack_order]) if stack_order else np.zeros((n, 0))
+    cum_max = np.max(np.cumsum(vals, axis=1), axis=1) if vals.shape[1] > 0 else np.zeros(n)
+    y_max = max(1.0, float(np.max(cum_max))) if cum_max.size > 0 else 1.0
+    # Wenn Stromverbrauch angezeigt wird, in die Skalierung einbeziehen
+    try:
+        if show_consumption and dfagg is not None and 'Stromverbrauch' in dfagg.columns:
+            cons_arr = pd.to_numeric(dfagg['Stromverbrauch'], errors='coerce').fillna(0.0).to_numpy()
+            if cons_arr.size > 0:
+                y_max = max(y_max, float(np.nanmax(cons_arr)))
+    except Exception:
+        pass
+    y_scale = g.usable_height / max(y_max, 1e-9)
+    return y_max, y_scale
+
+
+def area_layers(dfc: pd.DataFrame, stack_order, y_scale: float,
+                g: Geometry = DEFAULT_GEOMETRY, colors: dict | None = None) -> list[Layer]:
+    """Gestapelte Flächen: je Energieträger Oberkante hin, Unterkante zurück.
+    Vereinfachung pro GRENZLINIE (simplify_mask): die Oberkante einer Fläche ist die
+    Unterkante der nächsten, beide bekommen dieselben Punkte – der Stapel bleibt lückenlos."""
+    colors = COLOR if colors is None else colors
+    n = len(dfc)
+    x_px = x_positions(n, g)
+    layers = []
+    offset = np.zeros(n)
+    offset_keep = simplify_mask(x_px, y_px(offset, y_scale, g), SIMPLIFY_TOLERANCE_PX)
+    for sname in stack_order:
+        top = offset + safe_numeric(dfc[sname])
+        y_top = y_px(top, y_scale, g)
+        top_keep = simplify_mask(x_px, y_top, SIMPLIFY_TOLERANCE_PX)
+        xs = np.concatenate([x_px[top_keep], x_px[offset_keep][::-1]])
+        ys = np.concatenate([y_top[top_keep], y_px(offset, y_scale, g)[offset_keep][::-1]])
+        layers.append(Layer(sname, _xy(xs, ys), fill=colors.get(sname, "#999999CC")))
+        offset, offset_keep = top, top_keep
+    return layers
+
+
+def consumption_layer(dfagg: pd.DataFrame | None, n: int, y_scale: float,
+                      g: Geometry = DEFAULT_GEOMETRY) -> list[Layer]:
+    """Stromverbrauch als rote Linie (nicht verschiebbar); leer, wenn die Spalte fehlt."""
+    if dfagg is None or 'Stromverbrauch' not in dfagg.columns:
+        return []
+    x_px = x_positions(n, g)
+    cons = pd.to_numeric(dfagg['Stromverbrauch'], errors='coerce').fillna(0.0).to_numpy()
+    # Länge an x_px angleichen
+    m = int(min(len(cons), len(x_px)))
+    if m == 0:
+        return []
+    x_line = x_px[:m]
+    y_line = y_px(cons[:m], y_scale, g)
+    keep = simplify_mask(x_line, y_line, SIMPLIFY_TOLERANCE_PX)
+    return [Layer('Stromverbrauch', _xy(x_line[keep], y_line[keep]), closed=False,
+                  stroke='#ff0000', stroke_width=4, opacity=1, movable=False)]
+
+
+def zero_line_layer(n: int, g: Geometry = DEFAULT_GEOMETRY) -> list[Layer]:
+    """Nullinie (immer sichtbar, sehr dünne schwarze Linie, nicht verschiebbar)."""
+    if n < 2:
+        return []
+    y0 = float(g.height - g.pad_bottom)
+    return [Layer('Nullinie', _xy([g.pad_left, g.width - g.pad_right], [y0, y0]), closed=False,
+                  stroke='#000000', stroke_width=1, opacity=1, movable=False)]
+
+
+# ---------------------------
+# Serializer: Layer -> Fabric-Objekt / Arrays
+# ---------------------------
+def layer_to_fabric(layer: Layer) -> dict:
+    """Fabric-Path-Objekt mit PFADKOORDINATEN RELATIV zu (0,0) und left/top = (minX, minY).
+    Dadurch stimmen Positionen/Abstände nach Verschieben & im SVG-Export."""
+    xy = layer.xy
+    min_x = float(np.min(xy[:, 0]))
+    min_y = float(np.min(xy[:, 1]))
+    path_str = encode_path(xy[:, 0] - min_x, xy[:, 1] - min_y, precision=PATH_PRECISION, close=layer.closed)
+    if layer.movable:
+        return {
+            "type": "path",
+            "path": path_str,
+            "left": min_x,            # Position im Canvas
+            "top": min_y,
+            "fill": layer.fill,
+            "stroke": layer.stroke,
+            "strokeWidth": layer.stroke_width,
+            "opacity": layer.opacity,
+            "selectable": True,
+            "hoverCursor": "move",
+            "name": layer.name,
+            "scaleX": 1.0,
+            "scaleY": 1.0,
+            "angle": 0,
+        }
+    return {
+        'type': 'path',
+        'path': path_str,
+        'left': min_x,
+        'top': min_y,
+        'stroke': layer.stroke,
+        'strokeWidth': layer.stroke_width,
+        **_LOCKED_LINE,
+        'name': layer.name,
+    }
+
+
+def layers_to_fabric(layers: list[Layer]) -> list[dict]:
+    return [layer_to_fabric(layer) for layer in layers]
+
+
+def layers_to_arrays(layers: list[Layer]) -> dict[str, np.ndarray]:
+    """Name -> (n, 2)-Vertex-Array (absolute Canvas-Pixel), z. B. für Benchmarks oder eigene Renderer."""
+    return {layer.name: layer.xy for layer in layers}
+
+
+# ---------------------------
+# Achsen (Fabric)
+# ---------------------------
+def fabric_text(text, left, top, *, angle=0, font_size=14, fill="#333333", name="label", locked=True):
+    return {
+        "type": "textbox",
+        "text": str(text),
+        "left": float(left),
+        "top": float(top),
+        "angle": float(angle),
+        "fontSize": int(font_size),
+        "fill": fill,
+        "name": name,
+        "selectable": not locked,
+        "evented": not locked,
+        "lockMovementX": locked,
+        "lockMovementY": locked,
+        "hasBorders": False,
+        "hasControls": False,
+        "editable": False,
+        "fontFamily": "Inter, Roboto, Arial, sans-serif",
+    }
+
+
+def fabric_line(x1, y1, x2, y2, *, stroke="#000000", width=1, name="axis", round_cap=True):
+    obj = {
+        "type": "line",
+        "x1": float(x1), "y1": float(y1),
+        "x2": float(x2), "y2": float(y2),
+        "stroke": stroke,
+        "strokeWidth": float(width),
+        "name": name,
+        "selectable": False,
+        "evented": False,
+    }
+    if round_cap:
+        obj["strokeLineCap"] = "round"
+    return obj
+
+
+def build_axes_objects(timestamps: pd.Series, x_px: np.ndarray, y_max_value: float,
+                       g: Geometry = DEFAULT_GEOMETRY) -> list[dict]:
+    """
+    Minimaler Achsen-Satz:
+      - X: Periodengrenzen (Ticks) + Labels zur Periodenmitte; Stufe nach Zeitraumlänge:
+           Tage (Wochentag bei 12:00), Wochen ('KW n') oder Monate ('Jan') – siehe time_axis_ticks
+      - Y: vertikale Achse links; "0" an der Nullinie; Einheiten-Titel; GW-Markierung
+    """
+    objs: list[dict] = []
+    # Basiskoordinaten
+    x_left = float(g.pad_left)
+    y_bottom = float(g.height - g.pad_bottom)
+    y_top = float(g.pad_top)
+
+    # Y-Achse
+    objs.append(fabric_line(x_left, y_top, x_left, y_bottom, stroke="#000000", width=1, name="axis-y", round_cap=True))
+
+    # X: Periodengrenzen als Ticks (etwas längere Linie) + Labels zur Periodenmitte
+    try:
+        n = len(x_px)
+        if n > 0:
+            _, boundary_idx, label_idx, labels = time_axis_ticks(timestamps)
+            for x in x_px[boundary_idx.clip(0, n - 1)].tolist():
+                objs.append(fabric_line(x, y_bottom, x, y_bottom + 8, stroke="#000000", width=1, name="tick-x-boundary", round_cap=True))
+            for x_mid, label in zip(x_px[label_idx.clip(0, n - 1)].tolist(), labels):
+                # ~5 px halbe Zeichenbreite bei 14 px Schrift -> Label zentriert
+                objs.append(fabric_text(label, x_mid - 5 * len(label), y_bottom + 14, font_size=14, fill="#333333", name=f"ticklabel-x-mid-{label}", locked=True))
+    except Exception:
+        pass
+
+    # Y-"0" an Nullinie
+    objs.append(fabric_text("0", x_left - 12, y_bottom - 6, font_size=14, fill="#333333", name="ylabel-0", locked=True))
+
+    # Y: Einheiten-Titel (gedreht, mittig)
+    y_mid = (y_top + y_bottom) / 2.0
+    objs.append(fabric_text("Elektrische Leistung", x_left - 54, y_mid, angle=-90, font_size=14, fill="#333333", name="ylabel-title", locked=True))
+
+    # Y: GW-Markierung (abgerundete Maximalleistung)
+    try:
+        y_max_val = float(y_max_value)
+        gw_floor = int(y_max_val // 1000)  # volle GW
+        if gw_floor >= 1:
+            y_val = gw_floor * 1000.0
+            y_pos = float(g.height - g.pad_bottom - (y_val * (g.usable_height / max(y_max_val, 1e-9))))
+            # Tick an der Achse
+            objs.append(fabric_line(x_left - 6, y_pos, x_left, y_pos, stroke="#000000", width=1, name="tick-y-gw", round_cap=True))
+            # Label "x GW"
+            objs.append(fabric_text(f"{gw_floor} GW", x_left - 44, y_pos - 6, font_size=14, fill="#333333", name="ylabel-gw", locked=True))
+    except Exception:
+        pass
+
+    return objs
+
+
+# ---------------------------
+# Symbole (oben rechts)
+# ---------------------------
+def build_symbol_objects(g: Geometry = DEFAULT_GEOMETRY, icons=ICONS, icon_px: int = ICON_PX) -> list[dict]:
+    """Weiß hinterlegte PNG-Icons rechts oben untereinander (Assets aus ec_icons)."""
+    symbol_objects = []
+    for i, (name, path) in enumerate(icons):
+        # Einmal pro Prozess geladen und auf Anzeigegröße verkleinert (ec_icons)
+        asset = icon_asset(path, size_px=icon_px)
+        if asset is None:
+            continue
+
+        left = g.width - g.pad_right - icon_px - 12
+        top = g.pad_top + 12 + i * (icon_px + 12)  # vertikal untereinander
+
+        # Weißer Hintergrund hinter dem Icon
+        symbol_objects.append({
+            "type": "rect",
+            "left": left - 6,
+            "top": top - 6,
+            "width": icon_px + 12,
+            "height": icon_px + 12,
+            "fill": "#FFFFFF",
+            "name": f"icon-bg-{name}",
+            "selectable": False,
+            "evented": False,
+            "lockMovementX": True,
+            "lockMovementY": True,
+            "hasBorders": False,
+            "hasControls": False,
+        })
+
+        # Das eigentliche Icon
+        symbol_objects.append({
+            "type": "image",
+            "src": asset.data_url,
+            "left": left,
+            "top": top,
+            "width": asset.width,
+            "height": asset.height,
+            "angle": 0,
+            "scaleX": icon_px / asset.width,
+            "scaleY": icon_px / asset.height,
+            "name": f"icon:{name}",
+            "selectable": True,
+            "evented": True,
+            "lockMovementX": False,
+            "lockMovementY": False,
+            "hasBorders": True,
+            "hasControls": True,
+        })
+    return symbol_objects
+
+
+# ---------------------------
+# Layout-Deltas: Benutzer-Änderungen (Verschieben/Skalieren/Drehen) je benanntem Objekt
+# ---------------------------
+DELTA_EPS_PX = 0.01     # Fabric rundet Zahlen auf 2 Nachkommastellen -> kleiner Versatz ist Rauschen
+DELTA_EPS_SCALE = 1e-4
+_DELTA_DEFAULTS = {"scaleX": 1.0, "scaleY": 1.0, "angle": 0.0}
+
+
+def scene_key(*parts) -> str:
+    """Kurzer stabiler Schlüssel einer Szenen-Zusammensetzung (z. B. für den Canvas-Widget-Key)."""
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=6).hexdigest()
+
+
+def _delta_keys(objects: list[dict]) -> list[str | None]:
+    """Schlüssel je Objekt für die Delta-Zuordnung: der Name, bei mehrfach vergebenen Namen
+    (z. B. Achsen-Ticks) ergänzt um die laufende Nummer ('axis#3'). None für unbenannte Objekte."""
+    counts: dict[str, int] = {}
+    for obj in objects:
+        name = obj.get("name")
+        if name:
+            counts[name] = counts.get(name, 0) + 1
+    seen: dict[str, int] = {}
+    keys: list[str | None] = []
+    for obj in objects:
+        name = obj.get("name")
+        if not name:
+            keys.append(None)
+        elif counts[name] == 1:
+            keys.append(name)
+        else:
+            seen[name] = seen.get(name, 0) + 1
+            keys.append(f"{name}#{seen[name]}")
+    return keys
+
+
+def extract_deltas(json_data: dict | None, base_objects: list[dict]) -> dict[str, dict] | None:
+    """Änderungen des Canvas gegenüber den frisch erzeugten Objekten: {schlüssel: {dx, dy, scaleX, scaleY, angle}},
+    nur abweichende Werte (Schlüssel siehe _delta_keys). st_canvas liefert Fabric-toJSON() OHNE eigene
+    Properties wie 'name' – die Zuordnung erfolgt daher über die Position in der Objektliste (Typ wird geprüft).
+    None, wenn die Liste nicht zu base_objects passt (z. B. Canvas geleert oder Objekte hinzugefügt)."""
+    if not json_data or "objects" not in json_data:
+        return None
+    objs = json_data["objects"]
+    if len(objs) != len(base_objects):
+        return None
+    deltas: dict[str, dict] = {}
+    for cur, base, key in zip(objs, base_objects, _delta_keys(base_objects)):
+        if cur.get("type") != base.get("type"):
+            return None
+        if key is None or "left" not in base:
+            continue
+        d = {}
+        dx = float(cur.get("left", 0) or 0) - float(base["left"])
+        dy = float(cur.get("top", 0) or 0) - float(base.get("top", 0))
+        if abs(dx) > DELTA_EPS_PX:
+            d["dx"] = round(dx, 2)
+        if abs(dy) > DELTA_EPS_PX:
+            d["dy"] = round(dy, 2)
+        for prop, default in _DELTA_DEFAULTS.items():
+            v = float(cur.get(prop, default) or 0)
+            if abs(v - float(base.get(prop, default))) > DELTA_EPS_SCALE:
+                d[prop] = round(v, 4)
+        if d:
+            deltas[key] = d
+    return deltas
+
+
+def apply_deltas(objects: list[dict], deltas: dict[str, dict] | None) -> list[dict]:
+    """Deltas auf frisch erzeugte Objekte anwenden (Kopien, die Eingabe bleibt unverändert –
+    sie kann aus einem Cache stammen). Objekte ohne Delta werden unverändert übernommen."""
+    if not deltas:
+        return list(objects)
+    out = []
+    for obj, key in zip(objects, _delta_keys(objects)):
+        d = deltas.get(key) if key else None
+        if not d or "left" not in obj:
+            out.append(obj)
+            continue
+        obj = dict(obj)
+        obj["left"] = float(obj["left"]) + d.get("dx", 0.0)
+        obj["top"] = float(obj.get("top", 0)) + d.get("dy", 0.0)
+        for prop in _DELTA_DEFAULTS:
+            if prop in d:
+                obj[prop] = d[prop]
+        out.append(obj)
+    return out
+
+
+# ---------------------------
+# Komplette Szene (ohne Streamlit, z. B. für Batch-Rendering/Server)
+# ---------------------------
+class Scene(NamedTuple):
+    layers: list[Layer]       # Flächen + Linien als Vertex-Arrays
+    objects: list[dict]       # Achsen, Symbole (bereits Fabric-Objekte)
+    y_max: float
+    geometry: Geometry = DEFAULT_GEOMETRY
+
+
+@profiled("scene")
+def build_scene(dfc: pd.DataFrame, dfagg: pd.DataFrame | None, stack_order=None, *,
+                show_consumption: bool = True, show_axes: bool = True, show_symbols: bool = False,
+                g: Geometry = DEFAULT_GEOMETRY) -> Scene:
+    """Szene wie in der Canvas-App; Serialisierung per scene_to_fabric / iter_scene_svg / layers_to_arrays."""
+    available = [c for c in dfc.columns if c != "timestamp"]
+    stack_order = [s for s in (DEFAULT_ORDER if stack_order is None else stack_order) if s in available]
+    t = pd.to_datetime(dfc["timestamp"])
+    n = len(t)
+    y_max, y_scale = compute_scale(dfc, stack_order, dfagg, show_consumption, g)
+    layers = area_layers(dfc, stack_order, y_scale, g)
+    if show_consumption:
+        layers += consumption_layer(dfagg, n, y_scale, g)
+    layers += zero_line_layer(n, g)
+    objects = []
+    if show_axes:
+        objects += build_axes_objects(t, x_positions(n, g), y_max, g)
+    if show_symbols:
+        objects += build_symbol_objects(g)
+    return Scene(layers, objects, y_max, g)
+
+
+def scene_to_fabric(scene: Scene) -> dict:
+    """Fabric-JSON ('initial_drawing')."""
+    return {"version": FABRIC_VERSION, "objects": layers_to_fabric(scene.layers) + scene.objects}
+
+
+# ---------------------------
+# Fabric-JSON -> SVG (streamend)
+# ---------------------------
+# Standard für Exporte: 0.1 px, relative Kommandos, gekürzte Zahlen, Icons einmal in <defs>
+SVG_PRECISION = PATH_PRECISION
+SVG_CHUNK_SIZE = 64 * 1024
+
+_PATH_TOKEN = re.compile(r"[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_PATH_CMD = re.compile(r"[A-DF-Za-df-z]")  # Kommandobuchstaben (ohne Exponent 'e')
+
+
+def _esc(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def _path_segments(path_val) -> list[list]:
+    """Pfad als Segmentliste [['M', x, y], ['L', x, y], ..., ['Z']] –
+    aus unserem String-Format oder dem Array-Format von Fabric."""
+    if isinstance(path_val, str):
+        segs: list[list] = []
+        for tok in _PATH_TOKEN.findall(path_val):
+            if tok.isalpha():
+                segs.append([tok])
+            elif segs:
+                segs[-1].append(float(tok))
+        return segs
+    if isinstance(path_val, list):
+        return [list(seg) if isinstance(seg, list) else [seg] for seg in path_val if seg]
+    return []
+
+
+def _polyline_from_str(d: str) -> tuple[np.ndarray, np.ndarray, bool] | None:
+    # Schneller Weg für unser eigenes Format (encode_path): 'M x y L x y … [Z]'
+    cmds = "".join(_PATH_CMD.findall(d))
+    closed = cmds.endswith("Z") or cmds.endswith("z")
+    body = cmds[:-1] if closed else cmds
+    if not body or body[0] != "M" or body[1:].strip("L"):
+        return None
+    try:
+        nums = np.array(_PATH_CMD.sub(" ", d).split(), dtype=float)
+    except ValueError:
+        return None
+    if len(nums) != 2 * len(body):
+        return None
+    return nums[0::2], nums[1::2], closed
+
+
+def _polyline(segs: list[list]) -> tuple[np.ndarray, np.ndarray, bool] | None:
+    """(xs, ys, geschlossen), falls der Pfad ein einfacher Linienzug M L… [Z] ist, sonst None."""
+    if not segs or segs[0][0] != "M":
+        return None
+    closed = segs[-1][0] in ("Z", "z")
+    body = segs[:-1] if closed else segs
+    xs, ys = [], []
+    for i, seg in enumerate(body):
+        cmd, nums = seg[0], seg[1:]
+        if cmd not in ("M", "L") or (cmd == "M" and i > 0) or len(nums) % 2:
+            return None
+        xs.extend(nums[0::2])
+        ys.extend(nums[1::2])
+    return np.asarray(xs, dtype=float), np.asarray(ys, dtype=float), closed
+
+
+def _absolute_d(segs: list[list], precision: int) -> str:
+    p = int(precision)
+    return " ".join(
+        f"{seg[0]} " + " ".join(f"{float(v):.{p}f}" if isinstance(v, (int, float)) else str(v) for v in seg[1:])
+        if len(seg) > 1 else str(seg[0]) for seg in segs
+    )
+
+
+def path_d(path_val, precision: int | None = SVG_PRECISION, relative: bool = True, compact: bool = True) -> str:
+    """SVG-d-Attribut. precision=None: Zahlen unverändert übernehmen (bisheriges Verhalten).
+    Einfache Linienzüge werden relativ/kompakt kodiert, alles andere absolut mit gerundeten Zahlen."""
+    if precision is None:
+        # kann String (unser Format) oder Array (Fabric-Format) sein
+        return path_val if isinstance(path_val, str) else _absolute_d(_path_segments(path_val), 3)
+    poly = None
+    if relative and isinstance(path_val, str):
+        poly = _polyline_from_str(path_val)
+    segs = _path_segments(path_val) if poly is None else []
+    if relative and poly is None:
+        poly = _polyline(segs)
+    if poly is not None:
+        xs, ys, closed = poly
+        return encode_path_relative(xs, ys, precision=precision, close=closed, compact=compact)
+    d = _absolute_d(segs, precision)
+    return compact_numbers(d) if compact else d
+
+
+def _transform_attr(obj: dict) -> str:
+    # Transform aus left/top/angle/scale – Pfade/Bilder sind objektlokal
+    tx = float(obj.get("left", 0) or 0)
+    ty = float(obj.get("top", 0) or 0)
+    angle = float(obj.get("angle", 0) or 0)
+    sx = float(obj.get("scaleX", 1) or 1)
+    sy = float(obj.get("scaleY", 1) or 1)
+    transforms = []
+    if tx or ty:
+        transforms.append(f"translate({tx:.3f},{ty:.3f})")
+    if angle:
+        transforms.append(f"rotate({angle:.3f})")
+    if sx != 1 or sy != 1:
+        transforms.append(f"scale({sx:.6f},{sy:.6f})")
+    return f' transform="{" ".join(transforms)}"' if transforms else ""
+
+
+def _image_key(obj: dict) -> tuple:
+    return obj.get("src"), float(obj["width"]), float(obj["height"])
+
+
+def _shared_images(objects: list[dict]) -> dict[tuple, str]:
+    """Bilder, die mehrfach vorkommen -> id für <defs>/<use> (Inhalts-Hash der Quelle)."""
+    counts: dict[tuple, int] = {}
+    for obj in objects:
+        if obj.get("type") == "image" and obj.get("src") and "width" in obj:
+            key = _image_key(obj)
+            counts[key] = counts.get(key, 0) + 1
+    return {
+        key: "img-" + hashlib.blake2b(f"{key[0]}|{key[1]}|{key[2]}".encode("utf-8"), digest_size=6).hexdigest()
+        for key, c in counts.items() if c > 1
+    }
+
+
+def _svg_layer(layer: Layer, precision: int | None = SVG_PRECISION, relative: bool = True,
+               compact: bool = True) -> str:
+    # Direkt aus dem Vertex-Array – ohne Umweg über den Fabric-Pfadstring
+    p = PATH_PRECISION if precision is None else precision
+    xs, ys = layer.xy[:, 0], layer.xy[:, 1]
+    if relative:
+        d = encode_path_relative(xs, ys, precision=p, close=layer.closed, compact=compact)
+    else:
+        d = encode_path(xs, ys, precision=p, close=layer.closed)
+        d = compact_numbers(d) if compact else d
+    return (
+        f'<path d="{d}" fill="{layer.fill or "none"}" stroke="{layer.stroke}" '
+        f'stroke-width="{layer.stroke_width}" opacity="{layer.opacity}"/>'
+    )
+
+
+def _svg_object(obj: dict, shared: dict[tuple, str], **path_opts) -> str:
+    otype = obj.get("type")
+    if otype == "path":
+        d = path_d(obj.get("path"), **path_opts)
+        if not d:
+            return ""
+        fill = obj.get("fill", "none") or "none"
+        stroke = obj.get("stroke", "none")
+        stroke_w = obj.get("strokeWidth", 1)
+        opacity = obj.get("opacity", 1)
+        return (
+            f'<path d="{d}" fill="{fill}" stroke="{stroke}" stroke-width="{stroke_w}" '
+            f'opacity="{opacity}"{_transform_attr(obj)}/>'
+        )
+
+    if otype == "line":
+        x1, y1 = float(obj.get("x1", 0)), float(obj.get("y1", 0))
+        x2, y2 = float(obj.get("x2", 0)), float(obj.get("y2", 0))
+        if "width" in obj and "left" in obj:
+            # Von Fabric zurückgegeben: x1..y2 relativ zur Objektmitte
+            cx = float(obj["left"]) + float(obj.get("width", 0)) / 2.0
+            cy = float(obj["top"]) + float(obj.get("height", 0)) / 2.0
+            x1, y1, x2, y2 = cx + x1, cy + y1, cx + x2, cy + y2
+        cap = obj.get("strokeLineCap", "butt")
+        return (
+            f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" '
+            f'stroke="{obj.get("stroke", "#000000")}" stroke-width="{obj.get("strokeWidth", 1)}" '
+            f'stroke-linecap="{cap}"/>'
+        )
+
+    if otype == "rect":
+        return (
+            f'<rect width="{float(obj.get("width", 0)):.1f}" height="{float(obj.get("height", 0)):.1f}" '
+            f'fill="{obj.get("fill", "none") or "none"}"{_transform_attr(obj)}/>'
+        )
+
+    if otype == "image":
+        src = obj.get("src")
+        if not src or "width" not in obj:
+            return ""
+        ref = shared.get(_image_key(obj))
+        if ref:
+            return f'<use href="#{ref}"{_transform_attr(obj)}/>'
+        return (
+            f'<image href="{_esc(src)}" width="{float(obj["width"]):.1f}" height="{float(obj["height"]):.1f}"'
+            f'{_transform_attr(obj)}/>'
+        )
+
+    if otype in ("textbox", "text"):
+        text = _esc(obj.get("text") or "")
+        font_size = int(obj.get("fontSize", 14))
+        fill = obj.get("fill", "#000000")
+        # Fabric top ist obere Kante; SVG y ist baseline → ~ +0.8*font_size
+        x = float(obj.get("left", 0) or 0)
+        y = float(obj.get("top", 0) or 0)
+        angle = float(obj.get("angle", 0) or 0)
+        rot = f' transform="rotate({angle:.1f} {x:.1f} {y:.1f})"' if angle else ""
+        return f'<text x="{x:.1f}" y="{y + 0.8 * font_size:.1f}" font-size="{font_size}" fill="{fill}"{rot}>{text}</text>'
+
+    return ""
+
+
+def _iter_svg(items: list, width: int, height: int, *,
+              precision: int | None = SVG_PRECISION, relative: bool = True, compact: bool = True,
+              shared_defs: bool = True) -> Iterator[str]:
+    yield (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+           f'viewBox="0 0 {width} {height}">')
+
+    objects = [obj for obj in items if isinstance(obj, dict)]
+    shared = _shared_images(objects) if shared_defs else {}
+    if shared:
+        yield "<defs>"
+        for (src, w, h), ref in shared.items():
+            yield f'<image id="{ref}" href="{_esc(src)}" width="{w:.1f}" height="{h:.1f}"/>'
+        yield "</defs>"
+
+    path_opts = {"precision": precision, "relative": relative, "compact": compact}
+    for obj in items:
+        chunk = _svg_layer(obj, **path_opts) if isinstance(obj, Layer) else _svg_object(obj, shared, **path_opts)
+        if chunk:
+            yield chunk
+    yield "</svg>"
+
+
+def iter_fabric_svg(j: dict | None, width: int, height: int, **opts) -> Iterator[str]:
+    """SVG-Dokument als Folge von Teilstrings (ein Element pro Chunk) – z. B. für
+    Datei-Streams oder StreamingResponse; das Gesamtdokument liegt nie komplett im Speicher.
+      - precision: Nachkommastellen der Pfadkoordinaten (None = unverändert wie im Fabric-JSON)
+      - relative/compact: Linienzüge als 'M x y l dx dy …' ohne überflüssige Zeichen
+      - shared_defs: mehrfach verwendete Bilder einmal in <defs>, sonst per <use>"""
+    if not j or "objects" not in j:
+        return
+    yield from _iter_svg(j["objects"], width, height, **opts)
+
+
+def iter_scene_svg(scene: Scene, **opts) -> Iterator[str]:
+    """Wie iter_fabric_svg, aber direkt aus der Szene (Layer-Arrays, kein Parsen von Pfadstrings)."""
+    g = scene.geometry
+    yield from _iter_svg(list(scene.layers) + scene.objects, g.width, g.height, **opts)
+
+
+@profiled("serialize")
+def write_svg(chunks: Iterable[str], target) -> int:
+    """Schreibt SVG-Chunks gepuffert in eine Datei (Pfad) oder ein Datei-Objekt (binär oder Text).
+    Rückgabe: geschriebene Bytes (UTF-8)."""
+    if isinstance(target, (str, Path)):
+        with open(target, "wb") as fh:
+            return _write_chunks(chunks, fh)
+    return _write_chunks(chunks, target)
+
+
+def _write_chunks(chunks: Iterable[str], target) -> int:
+    # ohne eigene Stufe: sonst zählte ein Datei-Export zweimal als "serialize"
+    binary = not isinstance(target, io.TextIOBase)
+    written = 0
+    buf: list[str] = []
+    size = 0
+
+    def _flush():
+        nonlocal written
+        data = "".join(buf).encode("utf-8")
+        target.write(data if binary else data.decode("utf-8"))
+        written += len(data)
+
+    for chunk in chunks:
+        buf.append(chunk)
+        size += len(chunk)
+        if size >= SVG_CHUNK_SIZE:
+            _flush()
+            buf, size = [], 0
+    if buf:
+        _flush()
+    return written
+
+
+def write_fabric_svg(j: dict | None, width: int, height: int, target, **opts) -> int:
+    """Fabric-JSON gestreamt als SVG schreiben (siehe write_svg)."""
+    if not j or "objects" not in j:
+        return 0
+    return write_svg(iter_fabric_svg(j, width, height, **opts), target)
+
+
+@profiled("serialize")
+def fabric_json_to_svg(j: dict | None, width: int, height: int, **opts) -> str | None:
+    """Konvertiert Fabric-JSON (st_canvas) in SVG mit korrekten Positionen/Abständen.
+       Erwartet path-Objekte mit objektlokalen Koordinaten und left/top/scale/angle.
+       Linien, Rechtecke und Bilder (Achsen, Symbole) werden ebenfalls übernommen.
+       Optionen wie iter_fabric_svg."""
+    if not j or "objects" not in j:
+        return None
+    return "".join(iter_fabric_svg(j, width, height, **opts))
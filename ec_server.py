@@ -3,15 +3,40 @@
 """
 Unsere eigene FastAPI-Schnittstelle für Power-Daten.
 Ersetzt alte Plot-Funktion durch eine JSON-API mit flexiblem Zeitraum.
+- GET /power.svg (und /power.png, falls cairosvg installiert ist): Postkarten-Layout der
+  Canvas-Apps als Bild, z. B. zum Einbetten per <img> – ohne Streamlit-Session
+- EC_TRACE=1: Spans je Anfrage (Korrelations-ID aus X-Request-ID), lesbar über GET /debug/traces
+- EC_PROFILE=timing|cprofile|tracemalloc: Laufzeit/Profile je Stufe nach EC_PROFILE_DIR (ec_profile)
+- EC_POWER_CACHE=1: /power liest aus dem prozessweiten Daten-Cache (ec_cache) statt
+  bei jeder Anfrage neu abzurufen (Standard aus: Antworten immer tagesaktuell)
 """
 from __future__ import annotations
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import datetime as dt
+import hashlib
+import os
 
-from ec_fetch import fetch_public_power, last_full_week
+from ec_cache import TTLCache, load_power_frames, ttl_for_range
+from ec_fetch import Countries, fetch_public_power, last_full_week
+from ec_profile import stage
+from ec_trace import REQUEST_ID_HEADERS, TRACE_ENABLED, recent_traces, span, trace
+from ec_pipeline import PIPELINE
+from ec_scene import DEFAULT_GEOMETRY
 from ec_transform import transform_df
 
+# Optional: lokaler Rasterizer für PNG
+try:
+    import cairosvg  # type: ignore
+except Exception:
+    cairosvg = None
+
+# Gerenderte Bilder: Schlüssel (start, end, country, Format, Stil) -> (ETag, Bytes)
+RENDER_CACHE = TTLCache(max_entries=256)
+MIN_SIZE_PX, MAX_SIZE_PX = 200, 4000
+POWER_USE_CACHE = os.environ.get("EC_POWER_CACHE", "0").lower() in ("1", "true", "yes")
+
 app = FastAPI(title="Energy Charts Project API")
 
 app.add_middleware(
@@ -23,24 +48,27 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def correlation_id(request: Request, call_next):
+    """Korrelations-ID aus dem Header übernehmen (oder erzeugen), Wurzel-Span je Anfrage, ID zurückgeben."""
+    incoming = next((request.headers[h] for h in REQUEST_ID_HEADERS if h in request.headers), None)
+    with trace(incoming) as request_id:
+        if request.url.path.startswith("/debug/"):
+            response = await call_next(request)
+        else:
+            with span(f"{request.method} {request.url.path}", query=str(request.url.query)) as attrs:
+                response = await call_next(request)
+                attrs["status"] = response.status_code
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 
-@app.get("/power")
-def get_power(
-    start: str = Query(default=None, description="YYYY-MM-DD (inklusive)"),
-    end: str = Query(default=None, description="YYYY-MM-DD (exklusive)"),
-):
-    """
-    Liefert Zeitreihen als JSON:
-    - timestamps
-    - erzeugerCombined
-    - ausgleich
-    - aggregated
-    Zeitraum [start, end). Fehlt einer, wird letzte volle Woche verwendet.
-    """
+def _parse_range(start: str | None, end: str | None) -> tuple[dt.date, dt.date]:
     try:
         if not start or not end:
             s, e = last_full_week()
@@ -50,13 +78,10 @@ def get_power(
             raise ValueError("end muss nach start liegen (exklusiv).")
     except Exception as ex:
         raise HTTPException(status_code=400, detail=f"Ungültiger Zeitraum: {ex}")
+    return s, e
 
-    try:
-        df_raw = fetch_public_power(s, e)
-        _, df_combined, df_bal, df_agg = transform_df(df_raw)
-    except Exception as ex:
-        raise HTTPException(status_code=500, detail=f"Datenabruf/Transformation fehlgeschlagen: {ex}")
 
+def _power_payload(s: dt.date, e: dt.date, df_combined, df_bal, df_agg) -> dict:
     return {
         "timestamps": df_combined["timestamp"].astype(str).tolist(),
         "erzeugerCombined": {c: df_combined[c].fillna(0).astype(float).tolist() for c in df_combined.columns if c != "timestamp"},
@@ -65,3 +90,116 @@ def get_power(
         "start": str(s),
         "end": str(e),
     }
+
+
+@app.get("/power")
+def get_power(
+    start: str = Query(default=None, description="YYYY-MM-DD (inklusive)"),
+    end: str = Query(default=None, description="YYYY-MM-DD (exklusive)"),
+):
+    """
+    Liefert Zeitreihen als JSON:
+    - timestamps
+    - erzeugerCombined
+    - ausgleich
+    - aggregated
+    Zeitraum [start, end). Fehlt einer, wird letzte volle Woche verwendet.
+    """
+    s, e = _parse_range(start, end)
+
+    try:
+        if POWER_USE_CACHE:
+            _, df_combined, df_bal, df_agg = load_power_frames(s, e)
+        else:
+            _, df_combined, df_bal, df_agg = transform_df(fetch_public_power(s, e))
+    except Exception as ex:
+        raise HTTPException(status_code=500, detail=f"Datenabruf/Transformation fehlgeschlagen: {ex}")
+
+    with stage("serialize", route="/power"):
+        return JSONResponse(_power_payload(s, e, df_combined, df_bal, df_agg))
+
+
+@app.get("/debug/traces")
+def debug_traces(
+    trace_id: str = Query(default=None, description="nur diese Korrelations-ID"),
+    limit: int = Query(default=20, ge=1, le=500, description="höchstens so viele Traces (neueste zuerst)"),
+):
+    """
+    Spans der letzten Anfragen aus dem Ringpuffer (EC_TRACE=1), je Korrelations-ID gruppiert.
+    """
+    if not TRACE_ENABLED:
+        raise HTTPException(status_code=404, detail="Tracing ist aus (EC_TRACE=1 setzen).")
+    return {"traces": recent_traces(trace_id, limit)}
+
+
+def _render_image(request: Request, fmt: str, start, end, country, width, height,
+                  consumption, axes, symbols) -> Response:
+    s, e = _parse_range(start, end)
+    try:
+        c = Countries(country.lower())
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Unbekanntes Land: {country}")
+    if fmt == "png" and cairosvg is None:
+        raise HTTPException(status_code=501, detail="PNG-Export nicht verfügbar (pip install cairosvg).")
+
+    key = (s, e, c, fmt, width, height, consumption, axes, symbols)
+    ttl = ttl_for_range(e)
+
+    def _load():
+        # Pipeline: nur Render-Optionen geändert -> fetch/transform/derive aus dem Cache
+        try:
+            svg = PIPELINE.get("svg", start=s, end=e, country=c, width=width, height=height,
+                               consumption=consumption, axes=axes, symbols=symbols)
+        except Exception as ex:
+            raise HTTPException(status_code=500, detail=f"Datenabruf/Transformation fehlgeschlagen: {ex}")
+        with stage("serialize", fmt=fmt):
+            body = svg.encode("utf-8")
+            if fmt == "png":
+                body = cairosvg.svg2png(bytestring=body)
+        return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"', body
+
+    etag, body = RENDER_CACHE.get_or_load(key, _load, ttl=ttl)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={int(ttl)}"}
+    media_type = "image/png" if fmt == "png" else "image/svg+xml"
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+@app.get("/power.svg")
+def get_power_svg(
+    request: Request,
+    start: str = Query(default=None, description="YYYY-MM-DD (inklusive)"),
+    end: str = Query(default=None, description="YYYY-MM-DD (exklusive)"),
+    country: str = Query(default="de", description="Ländercode, z. B. de, fr"),
+    width: int = Query(default=DEFAULT_GEOMETRY.width, ge=MIN_SIZE_PX, le=MAX_SIZE_PX),
+    height: int = Query(default=DEFAULT_GEOMETRY.height, ge=MIN_SIZE_PX, le=MAX_SIZE_PX),
+    consumption: bool = Query(default=True, description="Stromverbrauch als Linie"),
+    axes: bool = Query(default=False, description="Achsen einblenden"),
+    symbols: bool = Query(default=False, description="Symbole einblenden"),
+):
+    """
+    Postkarten-Layout (gestapelte Flächen wie in den Canvas-Apps) als SVG für [start, end).
+    Fehlt start oder end, wird die letzte volle Woche verwendet.
+    Gerendert über ec_pipeline (Zwischenstufen gecacht); das Bild selbst wird nach Zeitraum,
+    Land und Stil gecacht und mit ETag ausgeliefert (If-None-Match -> 304).
+    """
+    return _render_image(request, "svg", start, end, country, width, height, consumption, axes, symbols)
+
+
+@app.get("/power.png")
+def get_power_png(
+    request: Request,
+    start: str = Query(default=None, description="YYYY-MM-DD (inklusive)"),
+    end: str = Query(default=None, description="YYYY-MM-DD (exklusive)"),
+    country: str = Query(default="de", description="Ländercode, z. B. de, fr"),
+    width: int = Query(default=DEFAULT_GEOMETRY.width, ge=MIN_SIZE_PX, le=MAX_SIZE_PX),
+    height: int = Query(default=DEFAULT_GEOMETRY.height, ge=MIN_SIZE_PX, le=MAX_SIZE_PX),
+    consumption: bool = Query(default=True, description="Stromverbrauch als Linie"),
+    axes: bool = Query(default=False, description="Achsen einblenden"),
+    symbols: bool = Query(default=False, description="Symbole einblenden"),
+):
+    """
+    Wie /power.svg, gerastert als PNG. Benötigt cairosvg (sonst 501).
+    """
+    return _render_image(request, "png", start, end, country, width, height, consumption, axes, symbols)
@@ -0,0 +1,186 @@
+# ec_stub.py
+# -*- coding: utf-8 -*-
+"""
+Lokaler Stand-in für api.energy-charts.info (Entwicklung ohne Netz, Lasttests).
+- Liefert aufgezeichnete Antworten (ENERGY_CHARTS_MODE=record, gleiches Dateischema wie app.api)
+- Ohne Fixture optional synthetische /public_power-, /price-, /cbet-, /frequency- und
+  /installed_power-Daten (ec_synthetic.py)
+- Einstellbar: Latenz (+ Jitter), Bandbreite, Fehlerquote/-status
+- GET /__stats liefert Zähler (Anfragen je Endpunkt, injizierte Fehler)
+
+Aufruf:
+    python ec_stub.py --port 8001 --fixtures fixtures --latency-ms 300 --bandwidth-kbps 2000
+    ENERGY_CHARTS_BASE_URL=http://127.0.0.1:8001 streamlit run streamlit_app.py
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import ec_fetch  # noqa: F401  (Submodul-Pfad für app.*)
+from app.api import fixture_path
+from ec_synthetic import (
+    cbet_payload, frequency_payload, installed_power_payload, price_payload, public_power_payload,
+)
+
+# Bandbreite wird in Blöcken dieser Größe simuliert
+_CHUNK = 16 * 1024
+
+
+class StubConfig:
+    def __init__(self, fixtures: Path | None = None, synthetic: bool = True, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, bandwidth_kbps: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 500, seed: int | None = None):
+        self.fixtures = fixtures
+        self.synthetic = synthetic
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.bandwidth_kbps = bandwidth_kbps
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rng = random.Random(seed)
+        self.stats: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.stats[key] += 1
+
+    def roll_error(self) -> bool:
+        with self.lock:
+            return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+    def delay_s(self) -> float:
+        with self.lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000.0
+
+
+def _date_param(value: str) -> dt.date:
+    """start/end wie die echte API: ISO-Datum, ISO-Zeitpunkt oder Unix-Sekunden."""
+    if value.isdigit():
+        return dt.datetime.fromtimestamp(int(value), tz=dt.timezone.utc).date()
+    return dt.datetime.fromisoformat(value.replace("Z", "+00:00")).date()
+
+
+def synthetic_response(endpoint: str, params: dict[str, str]) -> tuple[int, object] | None:
+    """Synthetische Antwort oder None, wenn der Endpunkt nicht nachgebildet wird."""
+    if endpoint == "installed_power":  # ohne Zeitraum
+        if params.get("time_step", "yearly") not in ("yearly", "monthly"):
+            return 422, {"detail": [{"loc": ["query", "time_step"], "msg": "yearly oder monthly"}]}
+        seed = sum(map(ord, params.get("country", "de")))
+        return 200, installed_power_payload(params.get("time_step", "yearly"), seed=seed)
+    builders = {"public_power": public_power_payload, "price": price_payload, "cbet": cbet_payload,
+                "frequency": frequency_payload}
+    if endpoint not in builders:
+        return None
+    try:
+        end = _date_param(params["end"]) if "end" in params else dt.date.today()
+        start = _date_param(params["start"]) if "start" in params else end - dt.timedelta(days=1)
+    except ValueError as ex:
+        return 422, {"detail": [{"loc": ["query", "start/end"], "msg": str(ex)}]}
+    if end <= start:
+        end = start + dt.timedelta(days=1)  # API liefert bei start == end den ganzen Tag
+    seed = sum(map(ord, params.get("country", params.get("bzn", params.get("region", "de")))))
+    return 200, builders[endpoint](start, end, seed=seed)
+
+
+def resolve(cfg: StubConfig, endpoint: str, params: dict[str, str]) -> tuple[int, object]:
+    if cfg.fixtures is not None:
+        path = fixture_path(cfg.fixtures, endpoint, params)
+        if path.exists():
+            fixture = json.loads(path.read_text(encoding="utf-8"))
+            cfg.count("fixture")
+            return fixture["status"], fixture["body"]
+    if cfg.synthetic:
+        res = synthetic_response(endpoint, params)
+        if res is not None:
+            cfg.count("synthetic")
+            return res
+    cfg.count("not_found")
+    return 404, {"detail": f"Keine Fixture/keine Nachbildung für {endpoint}"}
+
+
+def make_handler(cfg: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):  # leise; Zähler über /__stats
+            pass
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            endpoint = url.path.strip("/")
+            if endpoint == "__stats":
+                self._send(200, json.dumps(dict(cfg.stats)).encode("utf-8"), throttle=False)
+                return
+            cfg.count(f"GET /{endpoint}")
+            time.sleep(cfg.delay_s())
+            if cfg.roll_error():
+                cfg.count("injected_error")
+                self._send(cfg.error_status, b'{"detail": "injected error"}', throttle=False)
+                return
+            status, body = resolve(cfg, endpoint, dict(parse_qsl(url.query)))
+            self._send(status, json.dumps(body).encode("utf-8"))
+
+        def _send(self, status: int, data: bytes, throttle: bool = True):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            if not (throttle and cfg.bandwidth_kbps > 0):
+                self.wfile.write(data)
+                return
+            per_chunk_s = _CHUNK * 8 / (cfg.bandwidth_kbps * 1000)
+            for i in range(0, len(data), _CHUNK):
+                self.wfile.write(data[i:i + _CHUNK])
+                time.sleep(per_chunk_s)
+
+    return Handler
+
+
+def serve(cfg: StubConfig, host: str = "127.0.0.1", port: int = 8001) -> ThreadingHTTPServer:
+    """Server erzeugen (noch nicht gestartet) – für Tests/Lasttests: threading.Thread(target=srv.serve_forever)."""
+    srv = ThreadingHTTPServer((host, port), make_handler(cfg))
+    srv.daemon_threads = True
+    return srv
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8001)
+    ap.add_argument("--fixtures", type=Path, default=None, help="Verzeichnis mit aufgezeichneten Antworten")
+    ap.add_argument("--no-synthetic", action="store_true", help="nur Fixtures, sonst 404")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--bandwidth-kbps", type=float, default=0.0, help="0 = unbegrenzt")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Anteil fehlerhafter Antworten (0..1)")
+    ap.add_argument("--error-status", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    cfg = StubConfig(args.fixtures, not args.no_synthetic, args.latency_ms, args.jitter_ms,
+                     args.bandwidth_kbps, args.error_rate, args.error_status, args.seed)
+    srv = serve(cfg, args.host, args.port)
+    print(f"Stub-Upstream auf http://{args.host}:{args.port} "
+          f"(ENERGY_CHARTS_BASE_URL=http://{args.host}:{args.port})", file=sys.stderr)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,200 @@
+# ec_synthetic.py
+# -*- coding: utf-8 -*-
+"""
+Synthetische Energy-Charts-Antworten für den lokalen Stub (ec_stub.py), Benchmarks und Tests (ohne Netz).
+- Gleiche Form wie /public_power: unix_seconds, production_types [{name, data}], deprecated
+- Alle Typen, die ec_transform erwartet, plus Load / Residual load / Handel / EE-Anteil
+- Plausible Verläufe: PV mit Tagesgang, Wind als Random Walk, Last mit Tages-/Wochengang
+- Deterministisch (seed) und vektorisiert – auch 10 Jahre in 15-min-Auflösung in < 1 s
+- Dazu /price (stündlich, EUR/MWh) und /cbet (Handel je Nachbarland, GW) in derselben Form wie die API
+- /frequency: Netzfrequenz im Sekundentakt um 50 Hz, mit seltenen Ausreißern (Ereignisse)
+- /installed_power: installierte Leistung (GW) je Jahr/Monat, passend zu den synthetischen Verläufen
+"""
+from __future__ import annotations
+import datetime as dt
+
+import numpy as np
+
+STEP_S = 15 * 60
+PRICE_STEP_S = 60 * 60
+FREQUENCY_STEP_S = 1
+CBET_NEIGHBORS = ["Austria", "Belgium", "Czech Republic", "Denmark", "France", "Netherlands", "Poland",
+                  "Switzerland", "Sum"]
+
+# Installierte Leistung in GW: (Stand 2015, Zubau je Jahr) – Namen wie in /installed_power
+_INSTALLED = {
+    "Nuclear": (10.8, -1.6),
+    "Lignite": (21.0, -0.6),
+    "Hard coal": (28.0, -1.6),
+    "Oil": (4.2, -0.1),
+    "Gas": (29.0, 0.4),
+    "Biomass": (7.0, 0.15),
+    "Hydro": (4.0, 0.0),
+    "Pumped storage": (9.0, 0.05),
+    "Wind offshore": (3.3, 0.6),
+    "Wind onshore": (41.0, 2.2),
+    "Solar DC": (22.0, 2.0),
+    "Battery Storage (Power)": (0.1, 1.0),
+    "Battery Storage (Capacity)": (0.2, 1.5),  # GWh
+}
+INSTALLED_FIRST_YEAR = 2015
+
+# Grundlast / Amplitude in MW (grob an DE angelehnt)
+_BASE = {
+    "Hydro Run-of-River": (1800, 300),
+    "Biomass": (4300, 200),
+    "Fossil brown coal / lignite": (9000, 3000),
+    "Fossil hard coal": (3000, 2000),
+    "Fossil oil": (300, 50),
+    "Fossil coal-derived gas": (400, 100),
+    "Fossil gas": (5000, 3000),
+    "Geothermal": (20, 2),
+    "Hydro water reservoir": (150, 100),
+    "Hydro pumped storage": (800, 800),
+    "Others": (300, 50),
+    "Waste": (900, 50),
+}
+PRODUCTION_TYPES = list(_BASE) + [
+    "Hydro pumped storage consumption",
+    "Wind offshore",
+    "Wind onshore",
+    "Solar",
+    "Load",
+    "Residual load",
+    "Renewable share of load",
+    "Cross border electricity trading",
+]
+
+
+def _utc_seconds(d: dt.date) -> int:
+    return int(dt.datetime(d.year, d.month, d.day, tzinfo=dt.timezone.utc).timestamp())
+
+
+def public_power_payload(start: str | dt.date, end: str | dt.date, seed: int = 0,
+                         missing_tail: int = 0) -> dict:
+    """Antwort wie EnergyChartsAPI.get_public_power für [start, end) in 15-min-Schritten.
+    missing_tail: so viele letzte Werte je Reihe als null (wie bei noch nicht gemeldeten Daten)."""
+    s = dt.date.fromisoformat(str(start))
+    e = dt.date.fromisoformat(str(end))
+    ts = np.arange(_utc_seconds(s), _utc_seconds(e), STEP_S, dtype=np.int64)
+    n = len(ts)
+    rng = np.random.default_rng(seed)
+
+    hour = (ts % 86400) / 3600.0
+    doy = ((ts // 86400) + 3) % 365.25  # grob: Tag im Jahr
+    weekday = ((ts // 86400) + 3) % 7   # 0 = Montag
+    daily = np.cos((hour - 13.0) / 24.0 * 2 * np.pi)
+    season = np.cos((doy - 172.0) / 365.25 * 2 * np.pi)  # +1 im Sommer
+
+    series: dict[str, np.ndarray] = {}
+    for name, (base, amp) in _BASE.items():
+        series[name] = np.clip(base + amp * (0.6 * daily + 0.4 * rng.standard_normal(n)), 0, None)
+
+    sun = np.clip(np.cos((hour - 12.5) / 14.0 * 2 * np.pi) - 0.25, 0, None) / 0.75
+    clouds = np.clip(1.0 - 0.5 * np.abs(np.cumsum(rng.standard_normal(n)) / np.sqrt(96) % 1.0), 0.3, 1.0)
+    series["Solar"] = sun * (20000 + 25000 * (season + 1) / 2) * clouds
+
+    walk = np.cumsum(rng.standard_normal(n)) / np.sqrt(max(n, 1)) * 3
+    wind = np.clip(0.35 + 0.2 * np.sin(walk) - 0.1 * season + 0.05 * rng.standard_normal(n), 0.02, 0.95)
+    series["Wind onshore"] = wind * 60000
+    series["Wind offshore"] = np.clip(wind * 1.2, 0, 1) * 8500
+
+    load = 55000 + 9000 * daily - 7000 * (weekday >= 5) + 4000 * (-season) + 1500 * rng.standard_normal(n)
+    series["Load"] = load
+    series["Hydro pumped storage consumption"] = -np.clip(1500 - 1500 * daily + 300 * rng.standard_normal(n), 0, None)
+    renew = sum(series[k] for k in ("Solar", "Wind onshore", "Wind offshore", "Biomass", "Hydro Run-of-River"))
+    series["Residual load"] = load - series["Solar"] - series["Wind onshore"] - series["Wind offshore"]
+    series["Renewable share of load"] = np.clip(renew / load * 100.0, 0, 100)
+    produced = sum(series[k] for k in _BASE) + series["Solar"] + series["Wind onshore"] + series["Wind offshore"]
+    series["Cross border electricity trading"] = load - produced
+
+    def _data(values: np.ndarray) -> list:
+        out = np.round(values, 1).tolist()
+        if missing_tail:
+            out[-missing_tail:] = [None] * min(missing_tail, len(out))
+        return out
+
+    return {
+        "unix_seconds": ts.tolist(),
+        "production_types": [{"name": name, "data": _data(series[name])} for name in PRODUCTION_TYPES],
+        "deprecated": False,
+    }
+
+
+def price_payload(start: str | dt.date, end: str | dt.date, seed: int = 0) -> dict:
+    """Antwort wie EnergyChartsAPI.get_price: stündlicher Day-Ahead-Preis mit Tagesgang."""
+    s = dt.date.fromisoformat(str(start))
+    e = dt.date.fromisoformat(str(end))
+    ts = np.arange(_utc_seconds(s), _utc_seconds(e), PRICE_STEP_S, dtype=np.int64)
+    rng = np.random.default_rng(seed + 1)
+    hour = (ts % 86400) / 3600.0
+    price = 80 + 35 * np.cos((hour - 19.0) / 24.0 * 2 * np.pi) - 25 * np.exp(-((hour - 13.0) / 2.5) ** 2)
+    price += 8 * rng.standard_normal(len(ts))
+    return {
+        "license_info": "synthetic",
+        "unix_seconds": ts.tolist(),
+        "price": np.round(price, 2).tolist(),
+        "unit": "EUR / MWh",
+        "deprecated": False,
+    }
+
+
+def cbet_payload(start: str | dt.date, end: str | dt.date, seed: int = 0) -> dict:
+    """Antwort wie EnergyChartsAPI.get_cbet: Handel je Nachbar in GW (+ Import, - Export), 15 min."""
+    s = dt.date.fromisoformat(str(start))
+    e = dt.date.fromisoformat(str(end))
+    ts = np.arange(_utc_seconds(s), _utc_seconds(e), STEP_S, dtype=np.int64)
+    rng = np.random.default_rng(seed + 2)
+    hour = (ts % 86400) / 3600.0
+    flows = []
+    for i, _ in enumerate(CBET_NEIGHBORS[:-1]):
+        base = rng.uniform(-1.5, 1.5)
+        flows.append(base + 0.8 * np.sin((hour + 3 * i) / 24.0 * 2 * np.pi) + 0.2 * rng.standard_normal(len(ts)))
+    flows.append(np.sum(flows, axis=0))
+    return {
+        "unix_seconds": ts.tolist(),
+        "countries": [{"name": n, "data": np.round(f, 3).tolist()} for n, f in zip(CBET_NEIGHBORS, flows)],
+        "deprecated": False,
+    }
+
+
+def frequency_payload(start: str | dt.date, end: str | dt.date, seed: int = 0,
+                      events_per_day: float = 3.0) -> dict:
+    """Antwort wie EnergyChartsAPI.get_frequency: Sekundenwerte in Hz (Drift um 50 Hz,
+    Schwingung nach der vollen Stunde) plus einige Einbrüche/Spitzen von 20–90 s mit bis zu ±0,2 Hz."""
+    s = dt.date.fromisoformat(str(start))
+    e = dt.date.fromisoformat(str(end))
+    ts = np.arange(_utc_seconds(s), _utc_seconds(e), FREQUENCY_STEP_S, dtype=np.int64)
+    n = len(ts)
+    rng = np.random.default_rng(seed + 3)
+    # langsame Drift (Stützstellen je Minute, linear interpoliert) + Messrauschen
+    knots = np.arange(0, n + 60, 60)
+    drift = np.cumsum(rng.standard_normal(len(knots)) * 0.006)
+    drift -= np.convolve(drift, np.ones(15) / 15, mode="same")  # um 0 halten
+    dev = np.interp(np.arange(n), knots, drift) + rng.standard_normal(n) * 0.002
+    dev += 0.015 * np.sin(ts / 900.0 * 2 * np.pi) * ((ts % 3600) < 300)
+    for _ in range(rng.poisson(events_per_day * n / 86400)):
+        at, length = int(rng.integers(0, max(1, n - 120))), int(rng.integers(20, 90))
+        depth = rng.choice([-1, 1]) * rng.uniform(0.12, 0.2)
+        dev[at:at + length] += depth * np.sin(np.linspace(0, np.pi, length))
+    return {"unix_seconds": ts.tolist(), "data": np.round(50.0 + dev, 4).tolist(), "deprecated": False}
+
+
+def installed_power_payload(time_step: str = "yearly", seed: int = 0, until: dt.date | None = None) -> dict:
+    """Antwort wie EnergyChartsAPI.get_installed_power (GW, Batteriekapazität GWh) ab 2015.
+    time_step "yearly": time = ["2015", …]; "monthly": time = ["01.2015", …] (linearer Zubau + Rauschen)."""
+    until = until or dt.date.today()
+    if time_step == "monthly":
+        months = [(y, m) for y in range(INSTALLED_FIRST_YEAR, until.year + 1) for m in range(1, 13)
+                  if (y, m) <= (until.year, until.month)]
+        time = [f"{m:02d}.{y}" for y, m in months]
+        years = np.array([y + (m - 1) / 12 for y, m in months]) - INSTALLED_FIRST_YEAR
+    else:
+        time = [str(y) for y in range(INSTALLED_FIRST_YEAR, until.year + 1)]
+        years = np.arange(len(time), dtype=float)
+    rng = np.random.default_rng(seed + 4)
+    types = []
+    for name, (base, growth) in _INSTALLED.items():
+        vals = np.clip(base + growth * years + 0.02 * base * rng.standard_normal(len(years)), 0, None)
+        types.append({"name": name, "data": np.round(vals, 3).tolist()})
+    return {"time": time, "production_types": types, "deprecated": False}
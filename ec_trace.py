@@ -0,0 +1,154 @@
+# ec_trace.py
+# -*- coding: utf-8 -*-
+"""
+Leichtgewichtiges Span-Tracing mit Korrelations-ID je Anfrage.
+- EC_TRACE=1 schaltet ein; Spans landen in einem Ringpuffer im Prozess (EC_TRACE_BUFFER, Standard 2000)
+  und optional zusätzlich als JSON-Zeilen in EC_TRACE_FILE (setzt EC_TRACE implizit)
+- Korrelations-ID: aus X-Request-ID / X-Correlation-ID der Anfrage, sonst neu erzeugt
+- Verschachtelung über contextvars – gilt auch in FastAPI-Threadpool-Threads (Kontext wird kopiert)
+- Spans entstehen über ec_profile.stage (fetch, parse, transform, scene, serialize)
+  und die Middleware in ec_server; GET /debug/traces liest den Ringpuffer
+"""
+from __future__ import annotations
+import contextlib
+import datetime as dt
+import functools
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Callable, Iterator, TypeVar
+
+TRACE_FILE = os.environ.get("EC_TRACE_FILE") or None
+TRACE_ENABLED = bool(TRACE_FILE) or os.environ.get("EC_TRACE", "0").lower() in ("1", "true", "yes")
+TRACE_BUFFER = int(os.environ.get("EC_TRACE_BUFFER", "2000"))
+REQUEST_ID_HEADERS = ("x-request-id", "x-correlation-id")
+F = TypeVar("F", bound=Callable)
+
+_trace_id: ContextVar[str | None] = ContextVar("ec_trace_id", default=None)
+_span_id: ContextVar[str | None] = ContextVar("ec_span_id", default=None)
+
+SPANS: deque[dict] = deque(maxlen=TRACE_BUFFER)
+_lock = threading.Lock()
+
+
+def new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def clean_id(value: str | None) -> str | None:
+    """Fremde IDs begrenzen (Länge, Zeichen), damit sie gefahrlos in Logs/Dateien landen."""
+    if not value:
+        return None
+    value = re.sub(r"[^A-Za-z0-9._:-]", "", value)[:64]
+    return value or None
+
+
+def current_trace_id() -> str | None:
+    return _trace_id.get()
+
+
+@contextlib.contextmanager
+def trace(trace_id: str | None = None) -> Iterator[str]:
+    """Setzt die Korrelations-ID für alles, was in diesem Kontext läuft."""
+    tid = clean_id(trace_id) or new_id()
+    token = _trace_id.set(tid)
+    try:
+        yield tid
+    finally:
+        _trace_id.reset(token)
+
+
+def _export(record: dict) -> None:
+    with _lock:
+        SPANS.append(record)
+        if TRACE_FILE:
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs) -> Iterator[dict]:
+    """Misst einen Abschnitt als Span. Liefert die Attribute (dict) zum Ergänzen, z. B. attrs["status"] = 200.
+    Ohne aktive Korrelations-ID beginnt der Span einen eigenen Trace."""
+    if not TRACE_ENABLED:
+        yield attrs
+        return
+
+    tid_token = None
+    if _trace_id.get() is None:
+        tid_token = _trace_id.set(new_id())
+    sid = new_id()
+    parent = _span_id.get()
+    sid_token = _span_id.set(sid)
+    started = time.time()
+    t0 = time.perf_counter()
+    error = None
+    try:
+        yield attrs
+    except BaseException as ex:
+        error = f"{type(ex).__name__}: {ex}"[:300]
+        raise
+    finally:
+        record = {
+            "trace_id": _trace_id.get(),
+            "span_id": sid,
+            "parent_id": parent,
+            "name": name,
+            "start": dt.datetime.fromtimestamp(started, dt.timezone.utc).isoformat(timespec="milliseconds"),
+            "duration_ms": round((time.perf_counter() - t0) * 1e3, 3),
+            "thread": threading.current_thread().name,
+            "attrs": attrs,
+        }
+        if error:
+            record["error"] = error
+        _span_id.reset(sid_token)
+        if tid_token is not None:
+            _trace_id.reset(tid_token)
+        _export(record)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Dekorator: ganze Funktion als Span. Ohne EC_TRACE unverändert."""
+    def deco(fn: F) -> F:
+        if not TRACE_ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return deco
+
+
+def recent_traces(trace_id: str | None = None, limit: int = 20) -> list[dict]:
+    """Spans aus dem Ringpuffer je Trace gruppiert, neueste zuerst.
+    Je Trace: Gesamtdauer (Wurzel-Span) und Spans in Startreihenfolge."""
+    with _lock:
+        spans = list(SPANS)
+    grouped: OrderedDict[str, list[dict]] = OrderedDict()
+    for s in reversed(spans):
+        if trace_id and s["trace_id"] != trace_id:
+            continue
+        if s["trace_id"] not in grouped:
+            if len(grouped) >= limit:
+                continue
+            grouped[s["trace_id"]] = []
+        grouped[s["trace_id"]].append(s)
+    out = []
+    for tid, items in grouped.items():
+        items.sort(key=lambda s: s["start"])
+        roots = [s for s in items if s["parent_id"] is None]
+        out.append({
+            "trace_id": tid,
+            "duration_ms": max((s["duration_ms"] for s in roots), default=None),
+            "spans": items,
+        })
+    return out
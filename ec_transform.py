@@ -4,6 +4,8 @@ from __future__ import annotations
 from typing import Tuple, Dict, List
 import pandas as pd
 
+from ec_profile import profiled
+
 COL_TIMESTAMP = "timestamp"
 
 # --- Detaillierte Erzeuger (Original-Spalten aus df_raw) ---
@@ -75,22 +77,63 @@ def _build_combined(df_erzeuger: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
-def transform_df(df_raw: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+def _require_timestamp(df_raw: pd.DataFrame) -> None:
     if COL_TIMESTAMP not in df_raw.columns:
         raise ValueError("Erwarte eine Spalte 'timestamp' in df_raw.")
 
-    # Detaillierte Erzeuger
-    df_erzeuger = _ensure_subset(df_raw, ERZEUGER_COLS)
 
-    # Zusammengefasste Erzeuger
-    df_erzeuger_combined = _build_combined(df_erzeuger)
+# Einzelne Teilergebnisse (auch einzeln nutzbar, z. B. von ec_pipeline)
+def erzeuger_frame(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Detaillierte Erzeuger (Original-Spalten)."""
+    _require_timestamp(df_raw)
+    return _ensure_subset(df_raw, ERZEUGER_COLS)
+
+
+def combined_frame(df_erzeuger: pd.DataFrame) -> pd.DataFrame:
+    """Zusammengefasste Erzeuger (deutsche Labels) aus erzeuger_frame."""
+    return _build_combined(df_erzeuger)
 
-    # Ausgleich (Original-Spalten) -> Umbenennen ins Deutsche
-    df_ausgleich_orig = _ensure_subset(df_raw, AUSGLEICH_COLS_ORIG)
-    df_ausgleich = df_ausgleich_orig.rename(columns=AUSGLEICH_RENAME)
 
-    # Aggregiert: nur "Load" -> direkt umbenannt zu "Stromverbrauch"
-    df_aggregated_orig = _ensure_subset(df_raw, AGGREGATED_COLS_ORIG)
-    df_aggregated = df_aggregated_orig.rename(columns=AGGREGATED_RENAME)
+def ausgleich_frame(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Ausgleich (Original-Spalten) -> Umbenennen ins Deutsche."""
+    _require_timestamp(df_raw)
+    return _ensure_subset(df_raw, AUSGLEICH_COLS_ORIG).rename(columns=AUSGLEICH_RENAME)
 
-    return df_erzeuger, df_erzeuger_combined, df_ausgleich, df_aggregated
+
+def aggregated_frame(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Aggregiert: nur "Load" -> direkt umbenannt zu "Stromverbrauch"."""
+    _require_timestamp(df_raw)
+    return _ensure_subset(df_raw, AGGREGATED_COLS_ORIG).rename(columns=AGGREGATED_RENAME)
+
+
+@profiled("transform")
+def transform_df(df_raw: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    df_erzeuger = erzeuger_frame(df_raw)
+    return df_erzeuger, combined_frame(df_erzeuger), ausgleich_frame(df_raw), aggregated_frame(df_raw)
+
+
+# --- Level-of-Detail: Auflösungsstufen für Übersicht und Zoom ---
+RESAMPLE_LADDER = ["15min", "1h", "3h", "6h", "12h", "1D", "7D"]
+
+
+def choose_resample_rule(span: pd.Timedelta, max_points: int) -> str:
+    """Feinste Stufe aus RESAMPLE_LADDER, die für `span` höchstens `max_points` Zeitpunkte ergibt."""
+    for rule in RESAMPLE_LADDER:
+        if span / pd.Timedelta(rule) <= max_points:
+            return rule
+    return RESAMPLE_LADDER[-1]
+
+
+def resample_mean(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """Mittelwert je Zeit-Bucket (Leistung in MW bleibt MW). 'timestamp' = Bucket-Beginn.
+    Ist `rule` nicht gröber als die native Auflösung, wird df unverändert zurückgegeben."""
+    if df.empty or COL_TIMESTAMP not in df.columns:
+        return df
+    ts = pd.to_datetime(df[COL_TIMESTAMP])
+    if len(ts) > 1 and pd.Timedelta(rule) <= ts.diff().median():
+        return df
+    values = df.drop(columns=[COL_TIMESTAMP]).apply(pd.to_numeric, errors="coerce")
+    values.index = ts
+    out = values.resample(rule).mean()
+    out.index.name = COL_TIMESTAMP
+    return out.reset_index()
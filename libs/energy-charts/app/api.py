@@ -5,8 +5,21 @@ This module provides a client for accessing the Energy Charts API.
 Classes:
     _BaseEnergyChartsAPI: A base class for making API requests to the Energy Charts API.
     EnergyChartsAPI: A derived class that provides specific methods for accessing various endpoints of the Energy Charts API.
+
+Environment:
+    ENERGY_CHARTS_BASE_URL: Override the API base URL (e.g. a local stand-in such as ec_stub.py).
+    ENERGY_CHARTS_MODE: "off" (default), "record", "replay" or "auto" (replay if a fixture exists, else record).
+    ENERGY_CHARTS_FIXTURES: Directory for recorded responses (default: ./fixtures).
+        Only definitive answers are recorded (200, and 422 validation errors); server errors,
+        404s and unparseable bodies are never stored, so a transient failure is not replayed.
+        A 200/422 with an unparseable body raises APIRequestError.
 """
 
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
 from typing import Any
 
 import requests
@@ -28,28 +41,84 @@ class ValidationError(Exception):
 
 
 class APIRequestError(Exception):
-    """Raised for unexpected API errors or non-200/422 status codes."""
+    """Raised for unexpected API errors or non-200/422 status codes.
+
+    Attributes:
+        status_code (int | None): HTTP status of the response, None if there was none (e.g. missing fixture).
+    """
+
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+MODES = ("off", "record", "replay", "auto")
+RECORDED_STATUSES = (200, 422)
+
+
+def fixture_path(root: str | Path, endpoint: str, params: dict[str, Any]) -> Path:
+    """Returns the fixture file for a request: <root>/<endpoint>/<readable params>-<hash>.json.
+
+    The hash covers the sorted parameters, so the same request always maps to the same file.
+    """
+    canonical = json.dumps({k: str(v) for k, v in params.items() if v is not None}, sort_keys=True)
+    digest = hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:10]
+    slug = "_".join(f"{k}={v}" for k, v in sorted(params.items()) if v is not None)
+    slug = re.sub(r"[^A-Za-z0-9=._-]+", "-", slug)[:80] or "default"
+    return Path(root) / endpoint / f"{slug}-{digest}.json"
 
 
 class _BaseEnergyChartsAPI:
     BASE_URL = "https://api.energy-charts.info"
 
-    def __init__(self):
+    def __init__(self, base_url: str | None = None, mode: str | None = None, fixtures: str | Path | None = None):
         self.session = requests.Session()
+        self.base_url = (base_url or os.environ.get("ENERGY_CHARTS_BASE_URL") or self.BASE_URL).rstrip("/")
+        self.mode = (mode or os.environ.get("ENERGY_CHARTS_MODE") or "off").lower()
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown mode {self.mode!r}, expected one of {MODES}")
+        self.fixtures = Path(fixtures or os.environ.get("ENERGY_CHARTS_FIXTURES") or "fixtures")
 
     def get(
         self, endpoint: Endpoints, **kwargs: dict[str, str | bool | int]
     ) -> dict[str, Any] | None:
-        url = f"{self.BASE_URL}/{endpoint.value}"
         params = {k: v for k, v in kwargs.items() if v is not None}  # Skip None values
+        path = fixture_path(self.fixtures, endpoint.value, params) if self.mode != "off" else None
+
+        if path is not None and self.mode in ("replay", "auto") and path.exists():
+            fixture = json.loads(path.read_text(encoding="utf-8"))
+            return self._handle(fixture["status"], fixture["body"])
+        if self.mode == "replay":
+            raise APIRequestError(f"No fixture for {endpoint.value} {params} ({path})")
+
+        url = f"{self.base_url}/{endpoint.value}"
         response = self.session.get(url, params=params)
-        match response.status_code:
+        try:
+            body = response.json()
+        except ValueError:
+            if response.status_code in RECORDED_STATUSES:
+                # e.g. a proxy or maintenance page served with 200: an error, and never recorded
+                raise APIRequestError(
+                    f"Unparseable response body (status {response.status_code})",
+                    status_code=response.status_code,
+                )
+            body = None
+        if path is not None and response.status_code in RECORDED_STATUSES:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fixture = {"endpoint": endpoint.value, "params": {k: str(v) for k, v in params.items()},
+                       "status": response.status_code, "body": body}
+            path.write_text(json.dumps(fixture), encoding="utf-8")
+        return self._handle(response.status_code, body)
+
+    @staticmethod
+    def _handle(status_code: int, body: Any) -> dict[str, Any] | None:
+        match status_code:
             case 200:
-                return response.json()
+                return body
             case 422:
-                raise ValidationError(response.json())
+                raise ValidationError(body)
             case _:
-                raise APIRequestError(f"Unexpected status code: {response.status_code}")
+                raise APIRequestError(f"Unexpected status code: {status_code}", status_code=status_code)
 
 
 class EnergyChartsAPI(_BaseEnergyChartsAPI):
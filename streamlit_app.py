@@ -10,15 +10,21 @@ Interaktive Streamlit-Oberfläche (ersetzt die klassische Plot-Routine).
 - Freundliche Meldung bei leeren/ zukünftigen Zeiträumen
 - Quellenangabe unter dem Plot
 - Button exakt auf Höhe der Datumsfelder (ohne fragile CSS-Hacks)
+- Zoom per Bereichsauswahl: Übersicht grob aggregiert, Ausschnitt feiner aus den geladenen Daten
+- Umschalter „Volle Auflösung“: ohne Vergröberung; große Punktzahlen dann kumulativ gestapelt per WebGL (Scattergl)
+- Lange Zeiträume werden blockweise geladen (neueste Daten zuerst) und schon teilweise gezeigt
+- Prozessweiter Daten-Cache (ec_cache): gleiche Zeiträume kosten nur einen Upstream-Abruf
 """
 from __future__ import annotations
 import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 import datetime as dt
 
-from ec_fetch import fetch_public_power, last_full_week
-from ec_transform import transform_df
+from ec_cache import iter_power_frames_progressive, load_power_frames
+from ec_fetch import last_full_week
+from ec_transform import choose_resample_rule, resample_mean
 
 # ---- Seitentitel wie zuvor ----
 st.set_page_config(page_title="Strommix in 🇩🇪: Energy-Charts", layout="wide")
@@ -58,6 +64,17 @@ STACK_ORDER = [
     "Pumpspeicher (Stromerzeugung)",
 ]
 
+# Level-of-Detail: max. Zeitpunkte je Reihe im Browser; kleinstes Zoom-Fenster
+LOD_MAX_POINTS = 1500
+LOD_MIN_WINDOW = pd.Timedelta(hours=2)
+
+# Ab dieser Punktzahl (Zeitpunkte × gestapelte Reihen) wird per WebGL gezeichnet – nur bei voller
+# Auflösung erreichbar (mit LOD bleibt es bei ≤ LOD_MAX_POINTS × Reihen). Ein Monat in Viertelstunden ≈ 30k.
+WEBGL_POINT_THRESHOLD = 25_000
+
+# Ab dieser Zeitraumlänge (Tage) wird blockweise geladen und zwischendurch gezeichnet
+PROGRESSIVE_MIN_DAYS = 14
+
 def _safe_numeric(series: pd.Series) -> pd.Series:
     return pd.to_numeric(series, errors="coerce").fillna(0.0)
 
@@ -66,15 +83,21 @@ def _try_get_column(df: pd.DataFrame, col: str) -> pd.Series | None:
         return _safe_numeric(df[col])
     return None
 
-def _build_stacked_traces_by_order(t: pd.Series, df_combined: pd.DataFrame, df_bal: pd.DataFrame) -> list[go.Scatter]:
-    """Baut gestapelte Flächen-Traces in fester Reihenfolge (unten→oben)."""
-    traces: list[go.Scatter] = []
+def _stack_series_by_order(df_combined: pd.DataFrame, df_bal: pd.DataFrame) -> list[tuple[str, pd.Series]]:
+    """Vorhandene Reihen in fester Stack-Reihenfolge (unten→oben)."""
+    out: list[tuple[str, pd.Series]] = []
     for name in STACK_ORDER:
         s = _try_get_column(df_bal, name)
         if s is None:
             s = _try_get_column(df_combined, name)
-        if s is None:
-            continue
+        if s is not None:
+            out.append((name, s))
+    return out
+
+def _build_stacked_traces_by_order(t: pd.Series, df_combined: pd.DataFrame, df_bal: pd.DataFrame) -> list[go.Scatter]:
+    """Baut gestapelte Flächen-Traces in fester Reihenfolge (unten→oben)."""
+    traces: list[go.Scatter] = []
+    for name, s in _stack_series_by_order(df_combined, df_bal):
         color = COLOR.get(name)
         traces.append(
             go.Scatter(
@@ -87,21 +110,127 @@ def _build_stacked_traces_by_order(t: pd.Series, df_combined: pd.DataFrame, df_b
         )
     return traces
 
-def _line_traces_from_df(df: pd.DataFrame, yaxis="y2", exclude=("timestamp",)):
+def _build_stacked_traces_webgl(t: pd.Series, df_combined: pd.DataFrame, df_bal: pd.DataFrame) -> list[go.Scattergl]:
+    """Wie _build_stacked_traces_by_order, aber für große Punktzahlen:
+    kumulative Summen werden hier berechnet (statt stackgroup im Browser)
+    und per WebGL gezeichnet. Hover zeigt weiterhin den Einzelwert."""
+    traces: list[go.Scattergl] = []
+    cum = np.zeros(len(t))
+    for i, (name, s) in enumerate(_stack_series_by_order(df_combined, df_bal)):
+        vals = s.to_numpy(dtype=float)
+        cum = cum + vals
+        color = COLOR.get(name)
+        traces.append(
+            go.Scattergl(
+                x=t, y=cum, name=name,
+                mode="lines",
+                fill="tozeroy" if i == 0 else "tonexty",
+                customdata=vals,
+                hovertemplate="%{customdata:.1f}",
+                line=dict(width=0.8, color=color) if color else dict(width=0.8),
+                fillcolor=color if color else None,
+            )
+        )
+    return traces
+
+def _use_webgl(t: pd.Series, df_combined: pd.DataFrame, df_bal: pd.DataFrame) -> bool:
+    return len(t) * len(_stack_series_by_order(df_combined, df_bal)) > WEBGL_POINT_THRESHOLD
+
+def _line_traces_from_df(df: pd.DataFrame, yaxis="y2", exclude=("timestamp",), webgl: bool = False):
     """Erzeugt Linien-Traces (Plotly) für rechte Achse ('Stromverbrauch')."""
+    trace_cls = go.Scattergl if webgl else go.Scatter
     traces = []
     t = pd.to_datetime(df["timestamp"])
     for c in [c for c in df.columns if c not in exclude]:
         y = pd.to_numeric(df[c], errors="coerce")
         color = COLOR.get(c)
         traces.append(
-            go.Scatter(
+            trace_cls(
                 x=t, y=y, name=c, mode="lines", yaxis=yaxis,
                 line=dict(width=2, color=color) if color else dict(width=2)
             )
         )
     return traces
 
+def _clip(df: pd.DataFrame, v0: pd.Timestamp, v1: pd.Timestamp) -> pd.DataFrame:
+    ts = pd.to_datetime(df["timestamp"])
+    return df.loc[(ts >= v0) & (ts < v1)].reset_index(drop=True)
+
+def _view_bounds(r_start: dt.date, r_end: dt.date, view) -> tuple[pd.Timestamp, pd.Timestamp]:
+    if view is None:
+        return pd.Timestamp(r_start), pd.Timestamp(r_end)
+    return view
+
+def _lod(frames, v0: pd.Timestamp, v1: pd.Timestamp,
+         full_res: bool = False) -> tuple[str, tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]]:
+    """(erzeugerCombined, ausgleich, aggregated) auf [v0, v1) begrenzen und passend vergröbern
+    (full_res: nur begrenzen)."""
+    if full_res:
+        return "original", tuple(_clip(df, v0, v1) for df in frames)
+    rule = choose_resample_rule(v1 - v0, LOD_MAX_POINTS)
+    return rule, tuple(resample_mean(_clip(df, v0, v1), rule) for df in frames)
+
+def _load_view(r_start: dt.date, r_end: dt.date, view,
+               full_res: bool = False) -> tuple[str, tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]]:
+    """Daten für das sichtbare Fenster in passender Auflösung (Level-of-Detail).
+    Geladen (und gecacht) wird immer der ganze Zeitraum in voller Auflösung; ein Zoom schneidet
+    daraus nur das Fenster aus und vergröbert weniger – ohne erneuten Upstream-Abruf.
+    Der Browser bekommt so nie mehr als ~LOD_MAX_POINTS Zeitpunkte je Reihe (außer mit full_res)."""
+    v0, v1 = _view_bounds(r_start, r_end, view)
+    _, dc, db, da = load_power_frames(r_start, r_end)
+    return _lod((dc, db, da), v0, v1, full_res)
+
+def _to_timestamp(x) -> pd.Timestamp:
+    # Plotly liefert Datumsachsen als String, ggf. auch als ms seit Epoche
+    if isinstance(x, (int, float)):
+        return pd.to_datetime(x, unit="ms")
+    return pd.Timestamp(x)
+
+def _selected_window(event, r_start: dt.date, r_end: dt.date) -> tuple[pd.Timestamp, pd.Timestamp] | None:
+    """Zeitfenster aus einer Box-Auswahl (auf den geladenen Zeitraum begrenzt)."""
+    try:
+        boxes = event["selection"]["box"]
+    except (KeyError, TypeError):
+        return None
+    if not boxes or len(boxes[0].get("x") or []) != 2:
+        return None
+    try:
+        x0, x1 = sorted(_to_timestamp(x) for x in boxes[0]["x"])
+    except (ValueError, TypeError):
+        return None
+    x0 = max(x0, pd.Timestamp(r_start))
+    x1 = min(x1, pd.Timestamp(r_end))
+    if x1 - x0 < LOD_MIN_WINDOW:
+        return None
+    return x0, x1
+
+def _build_figure(df_combined: pd.DataFrame, df_bal: pd.DataFrame, df_agg: pd.DataFrame, title: str) -> go.Figure:
+    t = pd.to_datetime(df_combined["timestamp"] if "timestamp" in df_combined else df_bal["timestamp"])
+    webgl = _use_webgl(t, df_combined, df_bal)
+    if webgl:
+        traces = _build_stacked_traces_webgl(t, df_combined, df_bal)
+    else:
+        traces = _build_stacked_traces_by_order(t, df_combined, df_bal)
+    traces += _line_traces_from_df(df_agg, yaxis="y2", webgl=webgl)
+
+    layout = go.Layout(
+        xaxis=dict(type="date"),
+        yaxis=dict(title="Leistung [MW]"),
+        yaxis2=dict(
+            title="Stromverbrauch",
+            overlaying="y",
+            side="right",
+            matches="y"       # identische Skala/Nullpunkt wie linke Achse
+        ),
+        hovermode="x unified",
+        dragmode="select",     # Bereich aufziehen = hineinzoomen
+        selectdirection="h",
+        legend=dict(orientation="h", y=-0.2),
+        title=title,
+        margin=dict(l=60, r=60, t=40, b=40)
+    )
+    return go.Figure(data=traces, layout=layout)
+
 # ---- Zeitraum-UI: Button exakt auf Höhe der Inputs ----
 default_s, default_e = last_full_week()
 col1, col2, col3 = st.columns([1, 1, 0.7])
@@ -119,21 +248,53 @@ with col3:
     st.markdown("&nbsp;", unsafe_allow_html=True)
     go_btn = st.button("📊 Plot aktualisieren", use_container_width=True)
 
-# ---- Hauptlogik ----
+full_res = st.toggle("Volle Auflösung", value=False,
+                     help="Ohne Vergröberung zeichnen; große Punktzahlen laufen dann über WebGL.")
+
+# ---- Session-State: geladener Zeitraum + sichtbares Zoom-Fenster ----
+ss = st.session_state
+if "range" not in ss:
+    ss.range = None      # (start, end) als dt.date, [start, end)
+if "view" not in ss:
+    ss.view = None       # (Timestamp, Timestamp) oder None = ganzer Zeitraum
+if "view_rev" not in ss:
+    ss.view_rev = 0      # neuer Chart-Key je Zoomstufe -> alte Box-Auswahl verfällt
+
 if go_btn:
     if end <= start:
         st.error("Ende muss nach Start liegen (exklusiv).")
         st.stop()
+    ss.range = (start, end)
+    ss.view = None
+    ss.view_rev += 1
 
-    try:
-        with st.spinner("Lade Daten..."):
-            df_raw = fetch_public_power(start, end)
-
-        if df_raw is None or df_raw.empty:
-            st.warning("Für den gewählten Zeitraum sind keine Daten verfügbar.")
-            st.stop()
+# ---- Hauptlogik ----
+if ss.range is not None:
+    r_start, r_end = ss.range
 
-        _, df_combined, df_bal, df_agg = transform_df(df_raw)
+    chart_slot = st.empty()
+    try:
+        if ss.view is None and (r_end - r_start).days > PROGRESSIVE_MIN_DAYS:
+            # Progressiv: neuester Block zuerst sichtbar, Rest wird nachgeladen
+            v0, v1 = _view_bounds(r_start, r_end, None)
+            progress = st.progress(0.0, text="Lade Daten...")
+            try:
+                for done, total, (_, dc, db, da) in iter_power_frames_progressive(r_start, r_end):
+                    rule, (df_combined, df_bal, df_agg) = _lod((dc, db, da), v0, v1, full_res)
+                    progress.progress(done / total, text=f"Lade Daten... ({done}/{total})")
+                    if done < total and not df_combined.empty:
+                        chart_slot.plotly_chart(
+                            _build_figure(df_combined, df_bal, df_agg, "Lade Daten..."),
+                            use_container_width=True,
+                        )
+            except Exception:
+                chart_slot.empty()  # keinen halb geladenen Zwischenstand stehen lassen
+                raise
+            finally:
+                progress.empty()
+        else:
+            with st.spinner("Lade Daten..."):
+                rule, (df_combined, df_bal, df_agg) = _load_view(r_start, r_end, ss.view, full_res)
 
         if df_combined.empty and df_bal.empty and df_agg.empty:
             st.warning("Für den gewählten Zeitraum sind keine Daten verfügbar.")
@@ -144,28 +305,32 @@ if go_btn:
         st.stop()
 
     # ---- Plot ----
-    t = pd.to_datetime(df_combined["timestamp"] if "timestamp" in df_combined else df_bal["timestamp"])
-    traces = []
-    traces += _build_stacked_traces_by_order(t, df_combined, df_bal)
-    traces += _line_traces_from_df(df_agg, yaxis="y2")
-
-    layout = go.Layout(
-        xaxis=dict(type="date"),
-        yaxis=dict(title="Leistung [MW]"),
-        yaxis2=dict(
-            title="Stromverbrauch",
-            overlaying="y",
-            side="right",
-            matches="y"       # identische Skala/Nullpunkt wie linke Achse
-        ),
-        hovermode="x unified",
-        legend=dict(orientation="h", y=-0.2),
-        title=f"{start:%d.%m.%Y} bis {(end - dt.timedelta(days=1)):%d.%m.%Y}",
-        margin=dict(l=60, r=60, t=40, b=40)
+    if ss.view is None:
+        title = f"{r_start:%d.%m.%Y} bis {(r_end - dt.timedelta(days=1)):%d.%m.%Y}"
+    else:
+        title = f"{ss.view[0]:%d.%m.%Y %H:%M} bis {ss.view[1]:%d.%m.%Y %H:%M}"
+    fig = _build_figure(df_combined, df_bal, df_agg, title)
+    event = chart_slot.plotly_chart(
+        fig, use_container_width=True,
+        on_select="rerun", selection_mode="box",
+        key=f"power_chart_{ss.view_rev}",
     )
 
-    fig = go.Figure(data=traces, layout=layout)
-    st.plotly_chart(fig, use_container_width=True)
+    # Zoom: Box-Auswahl -> nur das Fenster in feinerer Auflösung zeigen
+    window = _selected_window(event, r_start, r_end)
+    if window is not None:
+        ss.view = window
+        ss.view_rev += 1
+        st.rerun()
+
+    cap_col, reset_col = st.columns([3, 1])
+    with cap_col:
+        st.caption(f"Auflösung: {rule} · Bereich im Diagramm aufziehen, um hineinzuzoomen.")
+    with reset_col:
+        if ss.view is not None and st.button("🔍 Zoom zurücksetzen", use_container_width=True):
+            ss.view = None
+            ss.view_rev += 1
+            st.rerun()
 
     # ---- Quellenangabe ----
     st.markdown(